@@ -1,146 +1,228 @@
-from flask import Flask, render_template, request, session, redirect, url_for, jsonify
-import pandas as pd
-import requests
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from flask import Flask, Response, abort, render_template, request, session, redirect, stream_with_context, url_for, jsonify
+from markupsafe import Markup
+import numpy as np
+import csv
+import hmac
+import io
+import json
 import os
+from config import config
+from catalog import CATEGORIES, popularity_score, release_dates, to_records
+from snapshot import SnapshotManager
+from omdb import MISSING, OMDbCache, OMDbClient, TokenBucket
+from fragments import FragmentCache
+from pagination import SORT_KEYS, decode_cursor, encode_cursor, page
+from profiles import ProfileStore
+from metrics import RequestMetrics, render_counters, render_gauges
 
 app = Flask(__name__)
 app.secret_key = 'your_secret_key_here_change_it'
 
+# Per-route latency histograms and per-request timing spans, served at /metrics
+request_metrics = RequestMetrics(server_timing=config.SERVER_TIMING)
+request_metrics.init_app(app)
+span = request_metrics.span
+
 # OMDb API Configuration (You already have this!)
 # OMDB_API_KEY = '41e6a6fc'  # Your existing API key
-OMDB_API_KEY = '90998eb3'  # Your existing API key
+OMDB_API_KEY = config.OMDB_API_KEY  # Your existing API key
 # OMDB_API_KEY = 'e94ca55c'  # Your existing API key prafulla api key
-OMDB_BASE_URL = 'http://www.omdbapi.com/'
+OMDB_BASE_URL = config.OMDB_BASE_URL
 
-# Load datasets
-def load_datasets():
-    hollywood_df = pd.read_csv('dataset.csv')
-    
-    # For now, using hollywood dataset as template
-    # You'll replace these with actual Bollywood and Web Series datasets
-    try:
-        bollywood_df = pd.read_csv('bollywood.csv')
-    except FileNotFoundError:
-        bollywood_df = pd.DataFrame()
-    
-    try:
-        webseries_df = pd.read_csv('webseries.csv')
-    except FileNotFoundError:
-        webseries_df = pd.DataFrame()
-    
-    return hollywood_df, bollywood_df, webseries_df
-
-hollywood_movies, bollywood_movies, webseries = load_datasets()
-
-# Combine all datasets for search and filter
-def get_all_movies():
-    dfs = []
-    if not hollywood_movies.empty:
-        hollywood_copy = hollywood_movies.copy()
-        hollywood_copy['category'] = 'Hollywood'
-        dfs.append(hollywood_copy)
-    if not bollywood_movies.empty:
-        bollywood_copy = bollywood_movies.copy()
-        bollywood_copy['category'] = 'Bollywood'
-        dfs.append(bollywood_copy)
-    if not webseries.empty:
-        webseries_copy = webseries.copy()
-        webseries_copy['category'] = 'Web Series'
-        dfs.append(webseries_copy)
-    
-    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
-
-# Get movie details from OMDb API
-def get_omdb_details(movie_title):
+omdb_cache = OMDbCache(config.OMDB_CACHE_PATH, ttl=config.OMDB_CACHE_TTL,
+                       negative_ttl=config.OMDB_NEGATIVE_CACHE_TTL, max_entries=config.OMDB_CACHE_SIZE)
+omdb_client = OMDbClient(OMDB_API_KEY, OMDB_BASE_URL, cache=omdb_cache,
+                         timeout=config.OMDB_TIMEOUT, max_workers=config.OMDB_MAX_WORKERS,
+                         limiter=TokenBucket(config.OMDB_RATE_LIMIT, config.OMDB_RATE_BURST),
+                         queue_timeout=config.OMDB_QUEUE_TIMEOUT, backoff=config.OMDB_BACKOFF,
+                         max_backoff=config.OMDB_MAX_BACKOFF)
+
+dataset_paths = [config.HOLLYWOOD_DATASET, config.BOLLYWOOD_DATASET, config.WEBSERIES_DATASET]
+
+# The unified catalog plus its model and indexes, as one snapshot. Routes read
+# snapshots.current once per request; when a CSV changes (or /admin/reload is
+# hit) a new snapshot is built in the background and swapped in atomically.
+snapshots = SnapshotManager(dataset_paths, config, interval=config.RELOAD_INTERVAL)
+snapshots.start_watching()
+
+# Titles to prefetch from OMDb: what the landing and category pages show,
+# then the rest of the catalog by vote percentile
+def warm_titles(snap, limit):
+    catalog = snap.catalog
+    if catalog.empty:
+        return []
+    titles = []
+    if 'popularity' in catalog.columns:
+        titles += catalog.nlargest(12, 'popularity')['title'].tolist()
+    for movies in snap.category_movies.values():
+        titles += movies['title'].head(20).tolist()
+    order = np.argsort(-popularity_score(catalog), kind='stable')
+    titles += catalog['title'].to_numpy(dtype=object)[order[:limit]].tolist()
+    return list(dict.fromkeys(titles))[:limit]
+
+def start_omdb_warm_up():
+    """
+    Prefetch the most-shown titles in the background. Called when the server
+    starts (never on import, so CLIs, tests and benchmarks make no OMDb calls);
+    under another WSGI server call it from its worker start hook.
+    """
+    if config.OMDB_WARM_TITLES > 0:
+        return omdb_client.start_warm_up(warm_titles(snapshots.current, config.OMDB_WARM_TITLES))
+
+# Get movie details from OMDb API (cached, including "not found" answers);
+# cached_only never waits on OMDb, pages fill in posters through /api/posters
+def get_omdb_details(movie_title, cached_only=False):
+    with span('omdb'):
+        if cached_only:
+            return omdb_client.get_cached(movie_title)
+        return omdb_client.get_details(movie_title)
+
+# OMDb details for a list of movie dicts with one concurrent batch lookup
+# (cached_only: only what is already cached); MISSING where there is no answer yet
+def poster_details(movies, cached_only=False):
+    with span('omdb'):
+        if cached_only:
+            return {movie['title']: omdb_client.get_cached(movie['title'], MISSING) for movie in movies}
+        return omdb_client.get_details_batch([movie['title'] for movie in movies],
+                                             deadline=config.OMDB_BATCH_DEADLINE, missing=MISSING)
+
+# Attach posters to a list of movie dicts (titles without one stay placeholders)
+def add_posters(movies, cached_only=False, details=None):
+    if details is None:
+        details = poster_details(movies, cached_only)
+    for movie in movies:
+        omdb_data = details.get(movie['title'])
+        movie['poster'] = omdb_data['poster'] if omdb_data and omdb_data is not MISSING else None
+    return movies
+
+# Card lists and rendered card grids for the landing and category pages,
+# keyed by route and catalog version (so a reloaded catalog never sees them)
+fragment_cache = FragmentCache(config.FRAGMENT_CACHE_SIZE)
+
+def card_grid(snap, route, build_cards, show_category=False):
+    """
+    Rendered card grid for a listing page. The card list is computed once per
+    catalog version; the HTML is cached once OMDb has answered for every
+    poster on it (until then cached posters are applied per request).
+    """
+    key = (route, snap.version)
+    html = fragment_cache.get(('html',) + key)
+    if html is not None:
+        return html
+    
+    with span('dataset'):
+        cards = fragment_cache.get_or_build(('cards',) + key, build_cards)
+    movies = [dict(card) for card in cards]
+    details = poster_details(movies, cached_only=True)
+    add_posters(movies, details=details)
+    html = Markup(render_template('_movie_cards.html', movies=movies, show_category=show_category))
+    if all(data is not MISSING for data in details.values()):
+        fragment_cache.set(('html',) + key, html)
+    return html
+
+# Result sets of the paginated listings, as sorted positions in a precomputed
+# row order: page N is a binary search and a slice, never a re-sort or re-filter
+listing_cache = FragmentCache(config.LISTING_CACHE_SIZE)
+
+def listing_sort(default='default'):
+    sort = request.args.get('sort', default)
+    return sort if sort in SORT_KEYS else default
+
+def listing(snap, key, select_rows, sort):
+    """Positions of a result set in the sort order, computed once per catalog version"""
+    with span('dataset'):
+        return listing_cache.get_or_build((key, sort, snap.version),
+                                          lambda: snap.sort_orders.positions_of(select_rows(), sort))
+
+def listing_page(snap, positions, sort):
+    """Row ids for the ?cursor= page of a result set and the cursor for the next one"""
     try:
-        url = OMDB_BASE_URL
-        params = {
-            'apikey': OMDB_API_KEY,
-            't': movie_title,
-            'plot': 'full'
-        }
-        response = requests.get(url, params=params, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get('Response') == 'True':
-            # Extract relevant information
-            poster = data.get('Poster') if data.get('Poster') != 'N/A' else None
-            
-            # Parse cast (Actors field)
-            cast = data.get('Actors', '').split(', ')[:5] if data.get('Actors') != 'N/A' else []
-            
-            # Get director
-            director = data.get('Director', 'N/A')
-            
-            # Get IMDB link
-            imdb_id = data.get('imdbID')
-            imdb_link = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
-            
-            # Get runtime (convert "142 min" to 142)
-            runtime_str = data.get('Runtime', 'N/A')
-            runtime = int(runtime_str.split()[0]) if runtime_str != 'N/A' and runtime_str.split()[0].isdigit() else None
-            
-            # Get release date
-            release_date = data.get('Released', 'N/A')
-            
-            return {
-                'poster': poster,
-                'cast': cast,
-                'director': director,
-                'imdb_link': imdb_link,
-                'runtime': runtime,
-                'release_date': release_date,
-                'plot': data.get('Plot', ''),
-                'rated': data.get('Rated', 'N/A'),
-                'awards': data.get('Awards', 'N/A'),
-                'trailer': None  # OMDb doesn't provide trailers
-            }
-    except Exception as e:
-        print(f"OMDb API Error: {e}")
-    
-    return None
+        after = decode_cursor(request.args.get('cursor'), snap.version)
+    except ValueError:
+        abort(400, 'Invalid cursor')
+    shown, last = page(positions, after, config.NUM_MOVIES_PER_PAGE)
+    next_cursor = encode_cursor(snap.version, last) if last is not None else None
+    return snap.sort_orders.rows_at(shown, sort), next_cursor
+
+def page_links(next_cursor):
+    """URLs of the next and first pages, keeping the other query parameters"""
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    first_url = url_for(request.endpoint, **args) if request.args.get('cursor') else None
+    next_url = url_for(request.endpoint, **args, cursor=next_cursor) if next_cursor else None
+    return {'next_url': next_url, 'first_url': first_url}
+
+def select_rows(snap, query='', genre='', category=None, min_rating=None):
+    """Row ids matching a title search and/or facet filters"""
+    rows = snap.facet_index.filter(genre=genre, category=category, min_rating=min_rating)
+    if query:
+        matches = np.array(snap.search_index.search(query, limit=None), dtype=np.int32)
+        rows = np.intersect1d(rows, matches, assume_unique=True)
+    return rows
+
+def category_page(snap, category, columns):
+    """Paginated card grid of one category (the first page is shared by everyone)"""
+    sort = listing_sort()
+    positions = listing(snap, ('category', category), lambda: np.flatnonzero(snap.masks[category]), sort)
+    rows, next_cursor = listing_page(snap, positions, sort)
+    key = f"{request.path}?sort={sort}&cursor={request.args.get('cursor', '')}"
+    cards = card_grid(snap, key, lambda: to_records(snap.catalog.iloc[rows][columns]))
+    return cards, len(positions), page_links(next_cursor)
+
+# Server-side taste profiles behind the home page's "for you" feed
+profiles = ProfileStore(config.PROFILE_MAX_USERS, config.PROFILE_DECAY, config.PROFILE_HISTORY)
 
-# Content-based recommendation
-def recommend_movies(movie_title, dataset, num_recommendations=8):
-    if dataset.empty or movie_title not in dataset['title'].values:
+def for_you(snap, username):
+    """Cards for the user's feed, or [] until they have opened a title"""
+    with span('similarity'):
+        rows = profiles.recommend(username, snap, config.FOR_YOU_SIZE, ranker=snap.ranker)
+    if len(rows) == 0:
+        return []
+    with span('dataset'):
+        movies = to_records(snap.catalog.iloc[rows][['title', 'genre', 'rating', 'category']])
+    return add_posters(movies, cached_only=True)
+
+# Content-based recommendation; category=None recommends across all categories
+def recommend_movies(snap, movie_row, num_recommendations=8, category=None):
+    if snap.model is None:
         return []
     
-    tfidf = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = tfidf.fit_transform(dataset['overview'].fillna(''))
-    
-    movie_idx = dataset[dataset['title'] == movie_title].index[0]
-    similarity_scores = cosine_similarity(tfidf_matrix[movie_idx], tfidf_matrix).flatten()
-    
-    similar_idx = similarity_scores.argsort()[-(num_recommendations + 1):-1][::-1]
-    recommendations = dataset.iloc[similar_idx][['title', 'genre']].to_dict('records')
+    mask = snap.masks.get(category)
+    with span('similarity'):
+        similar_idx = snap.model.similar(movie_row, num_recommendations, mask, snap.ranker)
+    with span('dataset'):
+        recommendations = to_records(snap.catalog.iloc[similar_idx][['title', 'genre', 'category']])
     
-    # Add posters
-    for movie in recommendations:
-        omdb_data = get_omdb_details(movie['title'])
-        movie['poster'] = omdb_data['poster'] if omdb_data else None
+    # Add posters (cached ones only; the page loads the rest)
+    add_posters(recommendations, cached_only=True)
     
     return recommendations
 
+# ?scope= for recommendations: 'all', a category name, or (default) the title's own category
+def recommendation_scope(snap, movie_row):
+    scope = request.args.get('scope', '')
+    if scope == 'all':
+        return None
+    if scope in CATEGORIES:
+        return scope
+    return snap.catalog['category'].iat[movie_row]
+
 @app.route('/')
 def index():
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
     # Get popular movies for landing page
-    all_movies = get_all_movies()
+    snap = snapshots.current
+    all_movies = snap.catalog
     if not all_movies.empty and 'popularity' in all_movies.columns:
-        popular = all_movies.nlargest(12, 'popularity')[['title', 'genre', 'vote_average', 'category']].to_dict('records')
-        
-        for movie in popular:
-            omdb_data = get_omdb_details(movie['title'])
-            movie['poster'] = omdb_data['poster'] if omdb_data else None
+        popular = card_grid(snap, '/', lambda: to_records(all_movies.nlargest(12, 'popularity')[['title', 'genre', 'rating', 'category']]),
+                            show_category=True)
     else:
-        popular = []
+        popular = ''
     
-    return render_template('index.html', movies=popular, username=session.get('username'))
+    return render_template('index.html', cards=popular, for_you=for_you(snap, session['username']),
+                           username=session.get('username'))
 
 @app.route('/welcome', methods=['GET', 'POST'])
 def welcome():
@@ -156,47 +238,43 @@ def hollywood():
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
-    movies = hollywood_movies.head(20)[['title', 'genre', 'vote_average']].to_dict('records')
-    
-    for movie in movies:
-        omdb_data = get_omdb_details(movie['title'])
-        movie['poster'] = omdb_data['poster'] if omdb_data else None
+    snap = snapshots.current
+    movies, total, pages = category_page(snap, 'Hollywood', ['title', 'genre', 'rating'])
     
-    return render_template('category.html', movies=movies, category='Hollywood', username=session.get('username'))
+    return render_template('category.html', cards=movies, category='Hollywood', total=total, sort=listing_sort(),
+                           sort_keys=SORT_KEYS, **pages, username=session.get('username'))
 
 @app.route('/bollywood')
 def bollywood():
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
+    snap = snapshots.current
+    bollywood_movies = snap.category_movies['Bollywood']
     if bollywood_movies.empty:
-        return render_template('category.html', movies=[], category='Bollywood', 
+        return render_template('category.html', cards='', category='Bollywood', 
                              message="Bollywood dataset coming soon!", username=session.get('username'))
     
-    movies = bollywood_movies.head(20)[['title', 'genre', 'votes']].to_dict('records')
-    
-    for movie in movies:
-        omdb_data = get_omdb_details(movie['title'])
-        movie['poster'] = omdb_data['poster'] if omdb_data else None
+    movies, total, pages = category_page(snap, 'Bollywood', ['title', 'genre', 'rating', 'votes'])
     
-    return render_template('category.html', movies=movies, category='Bollywood', username=session.get('username'))
+    return render_template('category.html', cards=movies, category='Bollywood', total=total, sort=listing_sort(),
+                           sort_keys=SORT_KEYS, **pages, username=session.get('username'))
 
 @app.route('/webseries')
 def web_series():
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
+    snap = snapshots.current
+    webseries = snap.category_movies['Web Series']
     if webseries.empty:
-        return render_template('category.html', movies=[], category='Web Series', 
+        return render_template('category.html', cards='', category='Web Series', 
                              message="Web Series dataset coming soon!", username=session.get('username'))
     
-    series = webseries.head(20)[['title', 'genre', 'vote_count']].to_dict('records')
+    series, total, pages = category_page(snap, 'Web Series', ['title', 'genre', 'rating', 'votes'])
     
-    for show in series:
-        omdb_data = get_omdb_details(show['title'])
-        show['poster'] = omdb_data['poster'] if omdb_data else None
-    
-    return render_template('category.html', movies=series, category='Web Series', username=session.get('username'))
+    return render_template('category.html', cards=series, category='Web Series', total=total, sort=listing_sort(),
+                           sort_keys=SORT_KEYS, **pages, username=session.get('username'))
 
 @app.route('/search')
 def search():
@@ -204,19 +282,167 @@ def search():
         return redirect(url_for('welcome'))
     
     query = request.args.get('q', '').lower()
-    all_movies = get_all_movies()
+    snap = snapshots.current
+    all_movies = snap.catalog
     
+    pages = {}
     if query and not all_movies.empty:
-        results = all_movies[all_movies['title'].str.lower().str.contains(query, na=False)]
-        movies = results[['title', 'genre', 'vote_average', 'category']].head(20).to_dict('records')
+        # Best match first (vote percentile), like the search index itself
+        sort = listing_sort('popularity')
+        positions = listing(snap, ('search', query), lambda: snap.search_index.search(query, limit=None), sort)
+        rows, next_cursor = listing_page(snap, positions, sort)
+        with span('dataset'):
+            movies = to_records(all_movies.iloc[rows][['title', 'genre', 'rating', 'category']])
+        pages = page_links(next_cursor)
         
-        for movie in movies:
-            omdb_data = get_omdb_details(movie['title'])
-            movie['poster'] = omdb_data['poster'] if omdb_data else None
+        add_posters(movies, cached_only=True)
     else:
         movies = []
     
-    return render_template('search.html', movies=movies, query=query, username=session.get('username'))
+    return render_template('search.html', movies=movies, query=query, **pages, username=session.get('username'))
+
+
+@app.route('/api/posters')
+def posters():
+    """Poster URLs for ?titles=A&titles=B..., deduplicated and served from cache when possible"""
+    titles = list(dict.fromkeys(request.args.getlist('titles')))[:config.API_MAX_POSTERS]
+    with span('omdb'):
+        details = omdb_client.get_details_batch(titles, deadline=config.OMDB_BATCH_DEADLINE, missing=MISSING)
+    answered = all(data is not MISSING for data in details.values())
+    response = jsonify(posters={title: (data['poster'] if data and data is not MISSING else None)
+                                for title, data in details.items()})
+    # Only a complete answer is worth keeping: a title that missed the deadline
+    # (or failed) will be in the server cache on the next request
+    response.headers['Cache-Control'] = 'private, max-age=3600' if answered else 'no-store'
+    return response
+
+
+@app.route('/api/suggest')
+def suggest():
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    snap = snapshots.current
+    with span('dataset'):
+        rows = snap.search_index.suggest(query, limit=limit) if query else []
+        suggestions = to_records(snap.catalog.iloc[rows][['title', 'category', 'year']])
+    return jsonify(query=query, suggestions=suggestions)
+
+
+EXPORT_COLUMNS = ['title', 'category', 'genre', 'year', 'release_date', 'rating', 'votes', 'popularity',
+                  'runtime', 'original_language', 'certificate', 'overview']
+
+
+@app.route('/api/export.<fmt>')
+def export(fmt):
+    """
+    Stream a whole result set as NDJSON or CSV. Takes the /filter parameters
+    plus q (title search) and sort; rows are written in blocks, so memory
+    stays flat whatever the size of the result.
+    """
+    if fmt not in ('ndjson', 'csv'):
+        abort(404)
+    snap = snapshots.current
+    query = request.args.get('q', '')
+    genre = request.args.get('genre', '')
+    category = request.args.get('category', '').strip() or None
+    try:
+        min_rating = float(request.args['min_rating']) if request.args.get('min_rating') else None
+    except ValueError:
+        return jsonify(error='"min_rating" must be a number'), 400
+    sort = listing_sort('popularity' if query else 'default')
+    
+    positions = listing(snap, ('export', query, genre, category, min_rating),
+                        lambda: select_rows(snap, query, genre, category, min_rating), sort)
+    
+    def generate():
+        # Bound to the snapshot the request started with, even across a reload
+        if fmt == 'csv':
+            yield ','.join(EXPORT_COLUMNS) + '\r\n'
+        for start in range(0, len(positions), config.EXPORT_BLOCK_ROWS):
+            rows = snap.sort_orders.rows_at(positions[start:start + config.EXPORT_BLOCK_ROWS], sort)
+            # Every column but the overview (last), which comes from the snapshot:
+            # compact catalogs keep it out-of-line
+            block = snap.catalog.iloc[rows][EXPORT_COLUMNS[:-1]]
+            block = block.assign(release_date=release_dates(block['release_date']).dt.strftime('%Y-%m-%d'),
+                                 overview=[snap.overviews[row] for row in rows])
+            records = to_records(block)
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                csv.DictWriter(buffer, EXPORT_COLUMNS).writerows(records)
+                yield buffer.getvalue()
+            else:
+                yield ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=movies.{fmt}'
+    response.headers['X-Total-Count'] = str(len(positions))
+    return response
+
+
+@app.route('/api/recommendations', methods=['POST'])
+def api_recommendations():
+    """
+    Batch recommendations as JSON. Body:
+        {"titles": [...], "limit": 8, "scope": "same" | "all" | <category>,
+         "seed": false, "posters": false}
+    Each title gets its own list, or with "seed": true the titles are one
+    seed set and a single list similar to all of them comes back.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict):
+        return jsonify(error='the body must be a JSON object'), 400
+    titles = payload.get('titles')
+    if not isinstance(titles, list) or not all(isinstance(title, str) for title in titles):
+        return jsonify(error='"titles" must be a list of strings'), 400
+    if len(titles) > config.API_MAX_TITLES:
+        return jsonify(error=f'at most {config.API_MAX_TITLES} titles per request'), 400
+    try:
+        limit = min(max(int(payload.get('limit', config.NUM_RECOMMENDATIONS)), 1), config.API_MAX_RECOMMENDATIONS)
+    except (TypeError, ValueError, OverflowError):
+        return jsonify(error='"limit" must be an integer'), 400
+    scope = payload.get('scope', 'same')
+    if scope not in ('same', 'all', *CATEGORIES):
+        return jsonify(error=f'"scope" must be "same", "all" or one of {CATEGORIES}'), 400
+    
+    snap = snapshots.current
+    resolved = [(title, snap.title_index.resolve(title)) for title in titles]
+    found = [(title, row) for title, row in resolved if row is not None]
+    not_found = [title for title, row in resolved if row is None]
+    rows = np.array([row for _, row in found], dtype=np.int64)
+    
+    seed = bool(payload.get('seed'))
+    id_lists = []
+    if snap.model is not None and len(rows):
+        if scope == 'same':
+            # Each title's own category (any of the seeds' categories for a seed set)
+            masks = [snap.masks[c] for c in snap.catalog['category'].to_numpy()[rows]]
+            mask = np.logical_or.reduce(masks) if seed else np.stack(masks)
+        else:
+            mask = snap.masks.get(scope)
+        
+        with span('similarity'):
+            if seed:
+                id_lists = [snap.model.similar_to_set(rows, limit, mask, snap.ranker)]
+            else:
+                id_lists = snap.model.similar_batch(rows, limit, mask, snap.ranker)
+    
+    # One catalog lookup (and at most one poster batch) for every list at once
+    all_ids = np.concatenate(id_lists) if id_lists else np.empty(0, dtype=np.int64)
+    with span('dataset'):
+        records = to_records(snap.catalog.iloc[all_ids][['title', 'genre', 'category', 'year', 'rating']])
+    if payload.get('posters'):
+        add_posters(records)
+    bounds = np.cumsum([0] + [len(ids) for ids in id_lists])
+    lists = [records[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    
+    if seed:
+        return jsonify(seeds=[title for title, _ in found], recommendations=lists[0] if lists else [],
+                       not_found=not_found)
+    results = [{'title': title, 'recommendations': recs} for (title, _), recs in zip(found, lists)]
+    return jsonify(results=results, not_found=not_found)
 
 
 @app.route('/filter')
@@ -224,77 +450,68 @@ def filter_movies():
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
-    all_movies = get_all_movies()
+    snap = snapshots.current
+    all_movies = snap.catalog
     
     # Get filter parameters
     genre = request.args.get('genre', '')
     min_rating_str = request.args.get('min_rating')
     category = request.args.get('category', '')
     
-    filtered = all_movies.copy()
-    
-    if genre and 'genre' in filtered.columns:
-        filtered = filtered[filtered['genre'].str.contains(genre, case=False, na=False)]
-    
-    if min_rating_str and 'vote_average' in filtered.columns:
-        try:
-            min_rating = float(min_rating_str)
-            numeric_vote_average = pd.to_numeric(filtered['vote_average'], errors='coerce')
-            filtered = filtered[numeric_vote_average >= min_rating]
-        except(ValueError, TypeError):
-            pass
-    
-    if category and category.strip() and 'category' in filtered.columns:
-        filtered = filtered[filtered['category'] == category]
-    
-    movies = filtered[['title', 'genre', 'vote_average', 'category']].head(20).to_dict('records')
-    
-    for movie in movies:
-        omdb_data = get_omdb_details(movie['title'])
-        movie['poster'] = omdb_data['poster'] if omdb_data else None
-    
-    # --- HERE IS THE KEY CHANGE FOR THE NEW ERROR ---
-    # Ensure the genre column is all strings before processing
-    if 'genre' in all_movies.columns:
-        all_movies['genre'] = all_movies['genre'].astype(str)
-        genres = sorted(all_movies['genre'].str.split(',').explode().str.strip().unique().tolist())
-    else:
-        genres = []
-    # --- END OF KEY CHANGE ---
-    
-    return render_template('filter.html', movies=movies, genres=genres, username=session.get('username'))
+    try:
+        min_rating = float(min_rating_str) if min_rating_str else None
+    except ValueError:
+        min_rating = None
+    category = category.strip() or None
+    
+    sort = listing_sort()
+    filters = (genre, category, min_rating)
+    positions = listing(snap, ('filter',) + filters,
+                        lambda: snap.facet_index.filter(genre=genre, category=category, min_rating=min_rating), sort)
+    rows, next_cursor = listing_page(snap, positions, sort)
+    with span('dataset'):
+        movies = to_records(all_movies.iloc[rows][['title', 'genre', 'rating', 'category']])
+    
+    add_posters(movies, cached_only=True)
+    
+    # Genre list and per-facet counts come straight from the precomputed index
+    genres = snap.facet_index.genres
+    with span('dataset'):
+        facet_counts = listing_cache.get_or_build(('facet_counts',) + filters + (snap.version,),
+                                                  lambda: snap.facet_index.counts(*filters))
+    
+    return render_template('filter.html', movies=movies, genres=genres, facet_counts=facet_counts,
+                           total=len(positions), sort=sort, sort_keys=SORT_KEYS, **page_links(next_cursor),
+                           username=session.get('username'))
 
 @app.route('/movie/<path:movie_title>')
 def movie_detail(movie_title):
     if 'username' not in session:
         return redirect(url_for('welcome'))
     
-    all_movies = get_all_movies()
-    movie_data = all_movies[all_movies['title'] == movie_title]
-    
-    if movie_data.empty:
+    snap = snapshots.current
+    movie_row = snap.title_index.resolve(movie_title)
+    if movie_row is None:
         return "Movie not found", 404
     
-    movie = movie_data.iloc[0].to_dict()
+    with span('dataset'):
+        row = snap.catalog.iloc[[movie_row]]
+        movie = to_records(row.assign(release_date=release_dates(row['release_date'])))[0]
+        movie['overview'] = snap.overviews[movie_row]
+    profiles.record_view(session['username'], snap, movie_row)
+    movie['release_date'] = movie['release_date'].strftime('%d %b %Y') if movie['release_date'] is not None else None
     
     # Get OMDb details
-    omdb_data = get_omdb_details(movie_title)
+    omdb_data = get_omdb_details(movie['title'], cached_only=True)
     if omdb_data:
         movie.update(omdb_data)
     
     # Get recommendations
-    category = movie.get('category', 'Hollywood')
-    dataset = pd.DataFrame() # Initialize an empty DataFrame    
-    if category == 'Hollywood':
-        dataset = hollywood_movies
-    elif category == 'Bollywood':
-        dataset = bollywood_movies
-    else:
-        dataset = webseries
-    
-    recommendations = recommend_movies(movie_title, dataset, num_recommendations=6)
+    scope = recommendation_scope(snap, movie_row)
+    recommendations = recommend_movies(snap, movie_row, num_recommendations=6, category=scope)
     
-    return render_template('movie_detail.html', movie=movie, recommendations=recommendations, username=session.get('username'))
+    return render_template('movie_detail.html', movie=movie, recommendations=recommendations,
+                           scope=scope or 'all', username=session.get('username'))
 
 
 @app.route('/recommend')
@@ -306,23 +523,13 @@ def recommend():
     recommendations = []
     
     if query:
-        all_movies = get_all_movies()
-        # Find the movie in the combined dataset
-        movie_data = all_movies[all_movies['title'].str.lower() == query.lower()]
-
-        if not movie_data.empty:
-            movie_title = movie_data.iloc[0]['title']
-            # Get the category to use the correct dataset for recommendations
-            category = movie_data.iloc[0].get('category', 'Hollywood')
-            
-            if category == 'Hollywood':
-                dataset = hollywood_movies
-            elif category == 'Bollywood':
-                dataset = bollywood_movies
-            else:
-                dataset = webseries
-            
-            recommendations = recommend_movies(movie_title, dataset, num_recommendations=12)
+        # Find the movie in the combined dataset (case-insensitive)
+        snap = snapshots.current
+        movie_row = snap.title_index.resolve(query)
+
+        if movie_row is not None:
+            recommendations = recommend_movies(snap, movie_row, num_recommendations=12,
+                                               category=recommendation_scope(snap, movie_row))
 
     return render_template('recommendations.html', recommendations=recommendations, query=query, username=session.get('username'))
 
@@ -331,6 +538,70 @@ def inject_current_path():
     return {'current_path': request.path}
 
 
+@app.route('/api/omdb/stats')
+def omdb_stats():
+    return jsonify(omdb_cache.stats())
+
+
+OMDB_METRIC_HELP = {
+    'requests': 'HTTP requests sent to OMDb',
+    'errors': 'OMDb requests that failed (HTTP, quota or network errors)',
+    'timeouts': 'OMDb requests that timed out',
+    'deadline_exceeded': 'Poster lookups dropped because the page deadline passed',
+    'rate_limited': 'OMDb lookups dropped after waiting too long for a rate limit slot',
+    'coalesced': 'OMDb lookups that joined an identical request already in flight',
+    'warmed': 'Titles fetched by the startup warm-up',
+    'cache_hits': 'OMDb lookups served from the cache',
+    'cache_misses': 'OMDb lookups not in the cache'
+}
+
+
+def admin_denied():
+    """
+    Error response for an admin request, or None when it may go ahead. The
+    admin endpoints are disabled (404) unless ADMIN_TOKEN is set, and then
+    need it in the X-Admin-Token header: behind a reverse proxy every request
+    comes from localhost, so the client address proves nothing.
+    """
+    if not config.ADMIN_TOKEN:
+        return jsonify(error='not found'), 404
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode('utf-8'), config.ADMIN_TOKEN.encode('utf-8')):
+        return jsonify(error='forbidden'), 403
+    return None
+
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild the catalog snapshot in the background (?force=1 even if the CSVs look unchanged)"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    
+    started = snapshots.reload_async(force=request.args.get('force') == '1')
+    return jsonify(started=started, **snapshots.status()), 202
+
+
+@app.route('/admin/catalog')
+def admin_catalog():
+    """Catalog version, titles and the outcome of the last reload"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    return jsonify(snapshots.status())
+
+
+@app.route('/metrics')
+def metrics():
+    fragment_stats = fragment_cache.stats()
+    lines = render_counters('omdb', omdb_client.stats(), OMDB_METRIC_HELP)
+    lines += render_counters('fragment_cache', {'hits': fragment_stats['hits'], 'misses': fragment_stats['misses']},
+                             {'hits': 'Card list / card grid cache hits', 'misses': 'Card list / card grid cache misses'})
+    lines += render_gauges('profiles', profiles.stats(), {'users': 'Users with a "for you" profile in memory'})
+    body = request_metrics.render() + '\n'.join(lines) + '\n'
+    return body, 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
 @app.route('/about')
 def about():
     return render_template('about.html', username=session.get('username', ''))
@@ -341,4 +612,8 @@ def logout():
     return redirect(url_for('welcome'))
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    debug = True
+    # The debug reloader's parent process only watches files: warm up in the one serving
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_omdb_warm_up()
+    app.run(debug=debug, port=5000)
\ No newline at end of file
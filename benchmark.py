@@ -0,0 +1,213 @@
+"""
+Reproducible benchmark suite
+Drives the Flask app through its main routes against a local fake OMDb
+server (configurable latency and error rate), then microbenchmarks
+recommendation and catalog loading on synthetic catalogs. Results are
+printed (or written) as JSON so runs can be compared across commits.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --latency 0.05 --error-rate 0.1 --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlencode
+
+import numpy as np
+import pandas as pd
+
+from fake_omdb import FakeOMDbServer
+
+
+def summarize(latencies, elapsed=None):
+    """p50/p95/p99/mean in milliseconds plus throughput for a list of seconds"""
+    ms = np.asarray(latencies) * 1000
+    summary = {
+        'n': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'mean_ms': round(float(ms.mean()), 3)
+    }
+    total = elapsed if elapsed is not None else float(np.sum(latencies))
+    summary['throughput_per_s'] = round(len(ms) / total, 1) if total > 0 else None
+    return summary
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_routes(requests_per_route, latency, error_rate, seed):
+    """Latency of the main routes through the Flask test client"""
+    with FakeOMDbServer(latency=latency, error_rate=error_rate, seed=seed) as omdb, \
+            tempfile.TemporaryDirectory() as tmp:
+        # Set before the app (and its config) is imported
+        os.environ['OMDB_BASE_URL'] = omdb.url
+        os.environ['OMDB_CACHE_PATH'] = os.path.join(tmp, 'omdb_cache.sqlite3')
+        # Measure a cold cache: no background prefetch racing the timed requests
+        os.environ['OMDB_WARM_TITLES'] = '0'
+
+        import app
+
+        client = app.app.test_client()
+        with client.session_transaction() as sess:
+            sess['username'] = 'benchmark'
+
+        rng = np.random.default_rng(seed)
+        titles = app.snapshots.current.catalog['title'].to_numpy(dtype=object)
+        sample = [str(t) for t in rng.choice(titles, size=requests_per_route)]
+        genres = app.snapshots.current.facet_index.genres or ['']
+        routes = {
+            '/': lambda i: '/',
+            '/search': lambda i: '/search?' + urlencode({'q': sample[i][:4]}),
+            '/filter': lambda i: '/filter?' + urlencode({'genre': genres[i % len(genres)], 'min_rating': 5 + i % 4}),
+            '/movie/<title>': lambda i: '/movie/' + quote(sample[i], safe=''),
+            '/recommend': lambda i: '/recommend?' + urlencode({'q': sample[i]})
+        }
+
+        results = {}
+        for route, make_url in routes.items():
+            latencies = []
+            statuses = {}
+            start = time.perf_counter()
+            for i in range(requests_per_route):
+                response, seconds = timed(client.get, make_url(i))
+                latencies.append(seconds)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            results[route] = {**summarize(latencies, time.perf_counter() - start),
+                              'first_ms': round(latencies[0] * 1000, 3),
+                              'statuses': {str(code): count for code, count in sorted(statuses.items())}}
+            print(f"   {route:<16} p50 {results[route]['p50_ms']:>8.2f} ms   p99 {results[route]['p99_ms']:>8.2f} ms",
+                  file=sys.stderr)
+
+        results['omdb_upstream_requests'] = omdb.requests
+        return results
+
+
+def synthetic_dataset(n_rows, seed=0, vocabulary_size=20000, words_per_overview=30):
+    """A Hollywood-schema DataFrame of n_rows titles with Zipf-distributed overview words"""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    lengths = rng.integers(4, 10, size=vocabulary_size)
+    vocabulary = np.array([''.join(rng.choice(letters, size=length)) for length in lengths], dtype=object)
+
+    word_ids = np.minimum(rng.zipf(1.3, size=(n_rows, words_per_overview)) - 1, vocabulary_size - 1)
+    overviews = [' '.join(words) for words in vocabulary[word_ids]]
+    genres = np.array(['Action', 'Drama', 'Comedy', 'Crime', 'Romance', 'Thriller', 'Horror', 'Family'])
+    dates = pd.Timestamp('1950-01-01') + pd.to_timedelta(rng.integers(0, 27000, size=n_rows), unit='D')
+
+    return pd.DataFrame({
+        'id': np.arange(n_rows),
+        'title': [f"{vocabulary[a].title()} {vocabulary[b].title()} {i}"
+                  for i, (a, b) in enumerate(rng.integers(0, vocabulary_size, size=(n_rows, 2)))],
+        'genre': [','.join(pair) for pair in rng.choice(genres, size=(n_rows, 2))],
+        'original_language': 'en',
+        'overview': overviews,
+        'popularity': np.round(rng.lognormal(2.5, 1.0, size=n_rows), 3),
+        'release_date': dates.strftime('%d-%m-%Y'),
+        'vote_average': np.round(rng.normal(6.5, 0.8, size=n_rows).clip(1, 10), 1),
+        'vote_count': rng.integers(200, 30000, size=n_rows)
+    })
+
+
+def bench_synthetic(n_rows, queries, seed):
+    """Catalog load and recommendation latency on a synthetic catalog"""
+    from catalog import (build_catalog, category_masks, compile_catalog, load_compiled_catalog,
+                         quality_features, read_datasets, to_records)
+    from config import config
+    from recommender import HybridRanker, RecommendationModel
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, name) for name in ('dataset.csv', 'bollywood.csv', 'webseries.csv')]
+        synthetic_dataset(n_rows, seed).to_csv(paths[0], index=False)
+
+        catalog, seconds = timed(lambda: build_catalog(*read_datasets(*paths)))
+        results['csv_load_s'] = round(seconds, 3)
+        _, seconds = timed(compile_catalog, catalog, os.path.join(tmp, 'compiled'), paths)
+        results['compile_s'] = round(seconds, 3)
+        _, seconds = timed(load_compiled_catalog, os.path.join(tmp, 'compiled'), paths)
+        results['compiled_load_s'] = round(seconds, 3)
+
+        model, seconds = timed(RecommendationModel.fit, catalog['overview'])
+        results['fit_s'] = round(seconds, 3)
+        results['vocabulary'] = len(model.vocabulary)
+
+        # The same steps as app.recommend_movies, minus the poster lookup
+        masks = category_masks(catalog)
+        ranker = HybridRanker(*quality_features(catalog), config.HYBRID_WEIGHTS, config.HYBRID_POOL_FACTOR)
+        rows = np.random.default_rng(seed).integers(0, n_rows, size=queries)
+        latencies = []
+        start = time.perf_counter()
+        for row in rows:
+            t0 = time.perf_counter()
+            similar_idx = model.similar(row, 8, masks['Hollywood'], ranker)
+            to_records(catalog.iloc[similar_idx][['title', 'genre', 'category']])
+            latencies.append(time.perf_counter() - t0)
+        results['recommend'] = summarize(latencies, time.perf_counter() - start)
+
+        _, seconds = timed(model.similar_batch, rows, 8, masks['Hollywood'], ranker)
+        results['recommend_batch'] = {'n': queries, 'seconds': round(seconds, 3),
+                                      'throughput_per_s': round(queries / seconds, 1)}
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark routes and recommendation on synthetic catalogs')
+    parser.add_argument('--requests', type=int, default=50, help='requests per route')
+    parser.add_argument('--latency', type=float, default=0.02, help='fake OMDb latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of fake OMDb requests that fail')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[10000, 100000, 1000000],
+                        help='synthetic catalog sizes (none to skip)')
+    parser.add_argument('--queries', type=int, default=200, help='recommendations timed per synthetic catalog')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'settings': vars(args)
+    }
+
+    print(f"Routes ({args.requests} requests each, OMDb latency {args.latency}s, error rate {args.error_rate})",
+          file=sys.stderr)
+    report['routes'] = bench_routes(args.requests, args.latency, args.error_rate, args.seed)
+
+    report['synthetic'] = {}
+    for n_rows in args.sizes:
+        print(f"Synthetic catalog: {n_rows:,} titles", file=sys.stderr)
+        report['synthetic'][str(n_rows)] = result = bench_synthetic(n_rows, args.queries, args.seed)
+        print(f"   fit {result['fit_s']}s   recommend p50 {result['recommend']['p50_ms']} ms", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"✅ Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
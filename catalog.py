@@ -0,0 +1,336 @@
+"""
+Unified movie catalog
+Maps the three source datasets onto one schema and stacks them into a
+single DataFrame that is built once at load time and shared by every route
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar import TextColumn, read_manifest, read_table, read_text_column, write_table
+
+# Copy-on-write lets routes slice the shared catalog without copying it
+# (always on from pandas 3.0, where the option is deprecated)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+CATEGORIES = ['Hollywood', 'Bollywood', 'Web Series']
+
+# Hollywood release dates look like 25-12-2009
+RELEASE_DATE_FORMAT = '%d-%m-%Y'
+
+# Compact mode: low-cardinality text as categoricals, numbers downcast
+COMPACT_CATEGORICAL = ['genre', 'original_language', 'certificate']
+COMPACT_DTYPES = {
+    'rating': 'float32',
+    'popularity': 'float32',
+    'votes': 'Int32',
+    'year': 'Int16',
+    'runtime': 'Int16',
+    'source_row': 'int32'
+}
+
+CATALOG_COLUMNS = [
+    'title', 'genre', 'overview', 'rating', 'votes', 'popularity',
+    'year', 'release_date', 'runtime', 'original_language', 'certificate',
+    'category', 'source_row'
+]
+
+# Every source CSV needs these; the other columns are filled in when missing
+SOURCE_REQUIRED_COLUMNS = ['title', 'overview']
+
+
+def _column(df, name):
+    """Column from df, or an all-missing column if the dataset lacks it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype='object')
+
+
+def parse_number(series):
+    """Parse numbers like 16441, "16,441" or "124 min"; unparseable -> NaN"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64')
+    text = series.astype('string').str.replace(',', '', regex=False)
+    number = pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce')
+    return number.astype('float64')
+
+
+def _clean_text(series):
+    return series.astype('string').str.strip().fillna('').astype(object)
+
+
+def normalize_genre(series):
+    """'Drama,Crime' and 'Drama, Mystery   ' both become 'Drama, Crime' style"""
+    text = series.astype('string').str.strip()
+    return text.str.replace(r'\s*,\s*', ', ', regex=True).fillna('').astype(object)
+
+
+def normalize_dataset(df, category):
+    """Map one source dataset onto the catalog schema"""
+    if 'release_date' in df.columns:
+        release_date = pd.to_datetime(df['release_date'], format=RELEASE_DATE_FORMAT, errors='coerce')
+        year = release_date.dt.year
+    else:
+        release_date = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        # Bollywood years look like "2022", "2021–" or "I 2021"
+        year_source = df['year'] if 'year' in df.columns else _column(df, 'Released_year')
+        year = pd.to_numeric(year_source.astype('string').str.extract(r'(\d{4})', expand=False), errors='coerce')
+
+    rating = df['vote_average'] if 'vote_average' in df.columns else _column(df, 'rating')
+    votes = df['vote_count'] if 'vote_count' in df.columns else _column(df, 'votes')
+    runtime = df['runtime'] if 'runtime' in df.columns else _column(df, 'Duration (in Min)')
+
+    return pd.DataFrame({
+        'title': _clean_text(df['title']),
+        'genre': normalize_genre(_column(df, 'genre')),
+        'overview': _clean_text(_column(df, 'overview')),
+        'rating': parse_number(rating),
+        'votes': parse_number(votes).astype('Int64'),
+        'popularity': parse_number(_column(df, 'popularity')),
+        'year': year.astype('Int64'),
+        'release_date': release_date,
+        'runtime': parse_number(runtime).astype('Int64'),
+        'original_language': _column(df, 'original_language').astype(object),
+        'certificate': _column(df, 'certificate').astype(object),
+        'category': category,
+        'source_row': range(len(df))
+    }, index=df.index)
+
+
+def build_catalog(hollywood_df, bollywood_df, webseries_df):
+    """
+    Stack the normalized datasets (Hollywood, Bollywood, Web Series order)
+    into one catalog. Each category occupies a contiguous block of rows and
+    source_row is the row's position within its own dataset.
+    """
+    frames = [
+        normalize_dataset(df, category)
+        for df, category in zip([hollywood_df, bollywood_df, webseries_df], CATEGORIES)
+        if not df.empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+
+    catalog = pd.concat(frames, ignore_index=True)
+    catalog['category'] = catalog['category'].astype(pd.CategoricalDtype(CATEGORIES))
+    return catalog
+
+
+def read_datasets(hollywood_path, bollywood_path, webseries_path):
+    """Read the source CSVs; Bollywood and Web Series are optional (empty if missing)"""
+    hollywood_df = pd.read_csv(hollywood_path)
+    
+    try:
+        bollywood_df = pd.read_csv(bollywood_path)
+    except FileNotFoundError:
+        bollywood_df = pd.DataFrame()
+    
+    try:
+        webseries_df = pd.read_csv(webseries_path)
+    except FileNotFoundError:
+        webseries_df = pd.DataFrame()
+    
+    return hollywood_df, bollywood_df, webseries_df
+
+
+def check_sources(source_paths):
+    """
+    Raise ValueError unless every source CSV that exists parses, has the
+    required columns and at least one row. Bollywood and Web Series may be
+    absent, but an empty or broken file would silently drop its category.
+    """
+    for i, path in enumerate(source_paths):
+        try:
+            head = pd.read_csv(path, nrows=1)
+        except FileNotFoundError:
+            if i == 0:
+                raise
+            continue
+        except ValueError as e:
+            raise ValueError(f"{path}: not a readable CSV ({e})") from e
+        missing = [name for name in SOURCE_REQUIRED_COLUMNS if name not in head.columns]
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+        if head.empty:
+            raise ValueError(f"{path}: no rows")
+
+
+def category_ranges(catalog):
+    """(start, stop) row range of each category's block ((0, 0) if absent)"""
+    ranges = {}
+    for category in CATEGORIES:
+        rows = (catalog['category'] == category).to_numpy().nonzero()[0]
+        ranges[category] = (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (0, 0)
+    return ranges
+
+
+def category_views(catalog):
+    """Row slices of the catalog for each category (empty if absent)"""
+    return {category: catalog.iloc[start:stop] for category, (start, stop) in category_ranges(catalog).items()}
+
+
+def source_stamps(source_paths):
+    """(size, mtime) per source file, used to tell whether a compiled catalog is stale"""
+    stamps = {}
+    for path in source_paths:
+        try:
+            stat = os.stat(path)
+            stamps[path] = [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            stamps[path] = None
+    return stamps
+
+
+def compile_catalog(catalog, directory, source_paths):
+    """
+    Write the catalog in binary columnar form, stamped with its sources (the
+    overviews also out-of-line, for compact mode to memory-map)
+    """
+    write_table(catalog, directory, meta={'sources': source_stamps(source_paths)}, text_columns=['overview'])
+
+
+def load_compiled_catalog(directory, source_paths, mmap=True):
+    """
+    Memory-map a compiled catalog, or return None when there is none or any
+    source CSV changed since it was compiled
+    """
+    manifest = read_manifest(directory)
+    if manifest is None or manifest.get('sources') != source_stamps(source_paths):
+        return None
+
+    catalog = read_table(directory, mmap=mmap)
+    catalog['category'] = catalog['category'].astype(pd.CategoricalDtype(CATEGORIES))
+    return catalog
+
+
+def load_catalog(source_paths, compiled_dir):
+    """
+    The catalog for the (Hollywood, Bollywood, Web Series) source paths:
+    memory-mapped from compiled_dir when fresh, otherwise parsed from the CSVs
+    """
+    catalog = load_compiled_catalog(compiled_dir, source_paths)
+    if catalog is None:
+        catalog = build_catalog(*read_datasets(*source_paths))
+    return catalog
+
+
+def release_day_numbers(release_date):
+    """Release dates as nullable int32 days since 1970-01-01"""
+    days = release_date.to_numpy(dtype='datetime64[D]').view(np.int64)
+    missing = release_date.isna().to_numpy()
+    return pd.Series(pd.arrays.IntegerArray(np.where(missing, 0, days).astype(np.int32), missing),
+                     index=release_date.index)
+
+
+def release_dates(release_date):
+    """Release dates as datetimes, from either catalog form (datetimes or day numbers)"""
+    if pd.api.types.is_datetime64_any_dtype(release_date):
+        return release_date
+    return pd.to_datetime(release_date.astype('float64'), unit='D')
+
+
+def _compact_columns(catalog):
+    compact = catalog.copy()
+    for name in COMPACT_CATEGORICAL:
+        compact[name] = compact[name].astype('category')
+    compact = compact.astype(COMPACT_DTYPES)
+    compact['release_date'] = release_day_numbers(catalog['release_date'])
+    return compact
+
+
+def compact_catalog(catalog):
+    """
+    The catalog in compact form plus its overviews as a TextColumn, which
+    only the detail page and the vectorizer read. Genre strings become a
+    categorical; the facet index keeps genres as multi-hot bits.
+    """
+    return _compact_columns(catalog.drop(columns=['overview'])), TextColumn.from_strings(catalog['overview'])
+
+
+def load_compact_catalog(source_paths, compiled_dir):
+    """
+    Compact catalog and overviews for the source paths. From a fresh compiled
+    catalog the overviews stay memory-mapped and are never read into the
+    DataFrame; otherwise the full catalog is loaded and compacted.
+    """
+    manifest = read_manifest(compiled_dir)
+    if (manifest is not None and manifest.get('sources') == source_stamps(source_paths)
+            and 'overview' in manifest.get('text_columns', [])):
+        catalog = read_table(compiled_dir, exclude=['overview'])
+        catalog['category'] = catalog['category'].astype(pd.CategoricalDtype(CATEGORIES))
+        return _compact_columns(catalog), read_text_column(compiled_dir, 'overview')
+    return compact_catalog(load_catalog(source_paths, compiled_dir))
+
+
+def memory_report(catalog, overviews=None):
+    """Bytes per column (deep, so Python strings count) and the out-of-line overviews"""
+    usage = catalog.memory_usage(index=False, deep=True)
+    report = {name: int(usage[name]) for name in catalog.columns}
+    if overviews is not None:
+        report['overview'] = int(overviews.nbytes)
+    return report
+
+
+def category_masks(catalog):
+    """Boolean row mask per category, for filtering score vectors at query time"""
+    categories = catalog['category'].to_numpy()
+    return {category: categories == category for category in CATEGORIES}
+
+
+def popularity_score(catalog):
+    """
+    Vote-count percentile within each category (0-1). Vote counts come from
+    different sources per dataset, so raw counts are not comparable.
+    """
+    votes = catalog['votes'].astype('float64')
+    return votes.groupby(catalog['category'], observed=True).rank(pct=True).fillna(0.0).to_numpy()
+
+
+def quality_features(catalog):
+    """
+    Per-row item quality in [0, 1] for hybrid ranking, computed per category
+    because ratings and vote counts come from different sources:
+    - rating: Bayesian average (rating shrunk toward the category mean,
+      with the median vote count as the prior weight), min-max scaled
+    - popularity: log1p of the popularity column (vote count for datasets
+      without one), min-max scaled
+    """
+    rating = np.zeros(len(catalog), dtype=np.float32)
+    popularity = np.zeros(len(catalog), dtype=np.float32)
+
+    for category, rows in category_masks(catalog).items():
+        if not rows.any():
+            continue
+        ratings = catalog['rating'].to_numpy(dtype='float64', na_value=np.nan)[rows]
+        votes = catalog['votes'].to_numpy(dtype='float64', na_value=np.nan)[rows]
+        votes = np.where(np.isnan(ratings), 0.0, np.nan_to_num(votes))
+        rated = votes > 0
+        mean = np.average(ratings[rated], weights=votes[rated]) if rated.any() else 0.0
+        prior_votes = np.median(votes[rated]) if rated.any() else 1.0
+        bayes = (votes * np.nan_to_num(ratings) + prior_votes * mean) / (votes + prior_votes)
+        rating[rows] = _min_max(bayes)
+
+        raw = catalog['popularity'].to_numpy(dtype='float64', na_value=np.nan)[rows]
+        if np.isnan(raw).all():
+            raw = catalog['votes'].to_numpy(dtype='float64', na_value=np.nan)[rows]
+        popularity[rows] = _min_max(np.log1p(np.nan_to_num(raw)))
+
+    return rating, popularity
+
+
+def _min_max(values):
+    span = values.max() - values.min()
+    return (values - values.min()) / span if span > 0 else np.zeros_like(values)
+
+
+def to_records(frame):
+    """Rows as dicts for the templates, with missing values as None"""
+    # Compact float32 columns go through their shortest repr, so 6.7 stays 6.7
+    # rather than widening to 6.699999809265137
+    single = [name for name, dtype in frame.dtypes.items() if dtype == np.float32]
+    if single:
+        frame = frame.astype({name: str for name in single}).astype({name: 'float64' for name in single})
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
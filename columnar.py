@@ -0,0 +1,192 @@
+"""
+Binary columnar storage for DataFrames
+Each column is written as .npy files (strings as one UTF-8 byte blob plus
+offsets), so a table can be memory-mapped back without parsing
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+# Bumped whenever the on-disk layout changes; older tables count as not compiled
+FORMAT_VERSION = 2
+
+
+def _write_strings(values, path):
+    """Store strings as a TextColumn (UTF-8 blob plus byte offsets) and a null mask"""
+    TextColumn.from_strings(values).save(path)
+    np.save(path + '.mask.npy', np.asarray(pd.isna(values), dtype=bool))
+
+
+def _read_strings(path, mmap_mode):
+    """
+    Decode a string column straight from its (memory-mapped) blob. DataFrame
+    columns need Python strings, so these are still built per process; text
+    that should stay shared belongs in a TextColumn (see read_text_column).
+    """
+    column = TextColumn.load(path, mmap=mmap_mode is not None)
+    values = np.empty(len(column), dtype=object)
+    values[:] = column[0:len(column)]
+    values[np.load(path + '.mask.npy')] = None
+    return values
+
+
+class TextColumn:
+    """
+    Strings kept out of the DataFrame: one UTF-8 byte blob plus byte offsets.
+    A string is only decoded when it is read, and a saved column can be
+    memory-mapped so text nobody asks for never leaves the page cache.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        """Missing values are stored as empty strings"""
+        encoded = [b'' if value is None or value is pd.NA or value != value else str(value).encode('utf-8')
+                   for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, key):
+        """One string by row, or a list of strings for a slice of rows"""
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[row] for row in range(start, stop, step)]
+            # One copy out of the blob, then a decode per string
+            data = bytes(self.blob[self.offsets[start]:self.offsets[stop]])
+            bounds = (self.offsets[start:stop + 1] - self.offsets[start]).tolist()
+            return [data[a:b].decode('utf-8') for a, b in zip(bounds[:-1], bounds[1:])]
+        row = int(key)
+        if row < 0:
+            row += len(self)
+        return bytes(self.blob[self.offsets[row]:self.offsets[row + 1]]).decode('utf-8')
+
+    @property
+    def nbytes(self):
+        return self.blob.nbytes + self.offsets.nbytes
+
+    def save(self, path):
+        np.save(path + '.blob.npy', self.blob)
+        np.save(path + '.offsets.npy', self.offsets)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        offsets = np.load(path + '.offsets.npy')
+        # An empty file cannot be memory-mapped
+        mmap_mode = 'r' if mmap and offsets[-1] > 0 else None
+        return cls(np.load(path + '.blob.npy', mmap_mode=mmap_mode), offsets)
+
+
+def write_table(df, directory, meta=None, text_columns=()):
+    """
+    Write df into directory (replacing it atomically) with a manifest.
+    text_columns are also stored as TextColumns, for read_text_column.
+    """
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        path = os.path.join(tmp_dir, f"col{i}")
+        dtype = series.dtype
+
+        if isinstance(dtype, pd.CategoricalDtype):
+            kind = 'category'
+            np.save(path + '.npy', series.cat.codes.to_numpy())
+            extra = {'categories': [str(c) for c in dtype.categories]}
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            kind = 'datetime'
+            np.save(path + '.npy', series.to_numpy(dtype='datetime64[ns]').view(np.int64))
+            extra = {}
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(dtype):
+            kind = 'nullable_int'
+            np.save(path + '.npy', series.to_numpy(dtype='int64', na_value=0))
+            np.save(path + '.mask.npy', series.isna().to_numpy())
+            extra = {}
+        elif pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            kind = 'numeric'
+            np.save(path + '.npy', series.to_numpy())
+            extra = {}
+        else:
+            kind = 'string'
+            _write_strings(series.to_numpy(dtype=object), path)
+            extra = {}
+
+        columns.append({'name': name, 'kind': kind, 'file': f"col{i}", **extra})
+
+    for name in text_columns:
+        TextColumn.from_strings(df[name]).save(os.path.join(tmp_dir, f"{name}.text"))
+
+    manifest = {'format': FORMAT_VERSION, 'rows': len(df), 'columns': columns, 'text_columns': list(text_columns),
+                **(meta or {})}
+    with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def read_manifest(directory):
+    """The table's manifest, or None if nothing (in the current format) was compiled there"""
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format') == FORMAT_VERSION else None
+
+
+def read_table(directory, mmap=True, exclude=()):
+    """
+    Load a table written by write_table, minus the exclude columns. With
+    mmap=True numeric columns stay memory-mapped (shared between processes
+    through the page cache) and strings are decoded from mapped blobs.
+    """
+    manifest = read_manifest(directory)
+    mmap_mode = 'r' if mmap else None
+    data = {}
+
+    for column in manifest['columns']:
+        if column['name'] in exclude:
+            continue
+        path = os.path.join(directory, column['file'])
+        kind = column['kind']
+
+        if kind == 'category':
+            codes = np.load(path + '.npy')
+            dtype = pd.CategoricalDtype(column['categories'])
+            data[column['name']] = pd.Categorical.from_codes(codes, dtype=dtype)
+        elif kind == 'datetime':
+            data[column['name']] = np.load(path + '.npy', mmap_mode=mmap_mode).view('datetime64[ns]')
+        elif kind == 'nullable_int':
+            values = np.load(path + '.npy', mmap_mode=mmap_mode)
+            mask = np.load(path + '.mask.npy', mmap_mode=mmap_mode)
+            data[column['name']] = pd.arrays.IntegerArray(values, mask, copy=False)
+        elif kind == 'numeric':
+            data[column['name']] = np.load(path + '.npy', mmap_mode=mmap_mode)
+        else:
+            data[column['name']] = pd.Series(_read_strings(path, mmap_mode), dtype=object, copy=False)
+
+    return pd.DataFrame(data, copy=False)
+
+
+def read_text_column(directory, name, mmap=True):
+    """A column write_table stored as a TextColumn, or None if it did not"""
+    manifest = read_manifest(directory)
+    if manifest is None or name not in manifest.get('text_columns', []):
+        return None
+    return TextColumn.load(os.path.join(directory, f"{name}.text"), mmap=mmap)
@@ -11,6 +11,38 @@ class Config:
     # Flask Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
     
+    # OMDb API Configuration
+    OMDB_API_KEY = os.environ.get('OMDB_API_KEY') or '90998eb3'
+    OMDB_BASE_URL = os.environ.get('OMDB_BASE_URL') or 'http://www.omdbapi.com/'
+    
+    # OMDb metadata cache (in-process LRU in front of a SQLite file)
+    OMDB_CACHE_PATH = os.environ.get('OMDB_CACHE_PATH') or 'omdb_cache.sqlite3'
+    OMDB_CACHE_TTL = int(os.environ.get('OMDB_CACHE_TTL', 7 * 24 * 3600))  # 1 week
+    OMDB_NEGATIVE_CACHE_TTL = int(os.environ.get('OMDB_NEGATIVE_CACHE_TTL', 24 * 3600))  # "not found" answers
+    OMDB_CACHE_SIZE = 2048  # entries kept in memory
+    
+    # Batched poster lookups for grid pages
+    OMDB_TIMEOUT = 5  # seconds per HTTP request
+    OMDB_MAX_WORKERS = 8  # concurrent OMDb requests
+    OMDB_BATCH_DEADLINE = float(os.environ.get('OMDB_BATCH_DEADLINE', 3.0))  # seconds per page
+    API_MAX_POSTERS = 100  # titles per GET /api/posters request
+    
+    # Outbound OMDb rate limit (token bucket); lookups queue for a free slot and
+    # consecutive errors pause all requests, doubling from OMDB_BACKOFF seconds
+    OMDB_RATE_LIMIT = float(os.environ.get('OMDB_RATE_LIMIT', 10))  # requests per second, 0 for no limit
+    OMDB_RATE_BURST = 10
+    OMDB_QUEUE_TIMEOUT = 5  # seconds a lookup may wait for a request slot
+    OMDB_BACKOFF = 1.0
+    OMDB_MAX_BACKOFF = 60.0
+    # Top titles (listing pages first, then by votes) prefetched in the background at startup; 0 disables
+    OMDB_WARM_TITLES = int(os.environ.get('OMDB_WARM_TITLES', 200))
+    
+    # Card lists / rendered card grids of the landing and category pages
+    FRAGMENT_CACHE_SIZE = 256  # entries
+    
+    # SERVER_TIMING=1 adds a Server-Timing header (per-request spans) to every response
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+    
     # TMDB API Configuration
     TMDB_API_KEY = os.environ.get('TMDB_API_KEY') or 'YOUR_TMDB_API_KEY'
     TMDB_BASE_URL = 'https://api.themoviedb.org/3'
@@ -21,9 +53,53 @@ class Config:
     BOLLYWOOD_DATASET = 'bollywood.csv'
     WEBSERIES_DATASET = 'webseries.csv'
     
+    # Binary columnar catalog written by `python prepare_datasets.py compile`
+    COMPILED_DIR = os.environ.get('COMPILED_DIR') or 'compiled/catalog'
+    # COMPACT_CATALOG=1 keeps the catalog in compact form: categoricals, downcast
+    # numbers, dates as day numbers and overviews out-of-line (memory-mapped
+    # from the compiled catalog when there is one)
+    COMPACT_CATALOG = os.environ.get('COMPACT_CATALOG', '0') == '1'
+    
+    # Hot reload: the CSVs are checked every RELOAD_INTERVAL seconds (0 disables)
+    # and a changed catalog is rebuilt in the background and swapped in
+    RELOAD_INTERVAL = float(os.environ.get('RELOAD_INTERVAL', 5))
+    # The /admin endpoints need this in an X-Admin-Token header; unset, they
+    # are disabled
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # Fitted TF-IDF models are cached here, keyed by a fingerprint of each CSV
+    MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR') or 'model_cache'
+    
+    # MODEL_MMAP=1 memory-maps the cached model files read-only instead of loading
+    # them into each process, so multi-worker servers share one copy in the page cache
+    MODEL_MMAP = os.environ.get('MODEL_MMAP', '0') == '1'
+    
     # Recommendation Settings
+    # 'tfidf' (exact sparse cosine), 'lsa' (dense SVD embedding) or
+    # 'lsa-ivf' (embedding + approximate nearest neighbor index for huge catalogs)
+    RECOMMENDER_ENGINE = os.environ.get('RECOMMENDER_ENGINE') or 'tfidf'
+    LSA_DIMENSIONS = int(os.environ.get('LSA_DIMENSIONS', 128))
+    IVF_PROBES = 8  # clusters scanned per query in 'lsa-ivf' mode
+    # Hybrid ranking: the most similar titles (HYBRID_POOL_FACTOR times as many
+    # as shown) are re-ranked by similarity plus Bayesian-averaged rating and
+    # log-scaled popularity. Set both quality weights to 0 for pure similarity.
+    HYBRID_WEIGHTS = {
+        'similarity': 1.0,
+        'rating': float(os.environ.get('HYBRID_RATING_WEIGHT', 0.2)),
+        'popularity': float(os.environ.get('HYBRID_POPULARITY_WEIGHT', 0.1))
+    }
+    HYBRID_POOL_FACTOR = 4
     NUM_RECOMMENDATIONS = 8
+    # "For you" feed on the home page, built from the titles each user opened
+    FOR_YOU_SIZE = 12
+    PROFILE_DECAY = 0.9  # weight left on older views each time a new title is opened
+    PROFILE_HISTORY = 50  # titles remembered per user (to rebuild after a catalog reload)
+    PROFILE_MAX_USERS = 10000  # least recently active profiles are dropped beyond this
+    API_MAX_TITLES = 500  # titles per POST /api/recommendations request
+    API_MAX_RECOMMENDATIONS = 50  # recommendations per title in the JSON API
     NUM_MOVIES_PER_PAGE = 20
+    LISTING_CACHE_SIZE = 128  # paginated result sets kept (one int32 array each)
+    EXPORT_BLOCK_ROWS = 1000  # rows rendered per chunk of a streamed export
     
     # Session Configuration
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour in seconds
@@ -0,0 +1,173 @@
+"""
+Offline bulk export of "similar titles" for every row of the catalog
+The catalog is split into row blocks that worker processes score with one
+sparse matrix product each (the model files are memory-mapped, so workers
+share them). Results are streamed to disk block by block, so the full N x N
+similarity matrix is never held in memory.
+
+Usage:
+    python export_recommendations.py similar.ndjson
+    python export_recommendations.py similar.parquet --k 20 --scope all --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from catalog import CATEGORIES, load_catalog, quality_features
+from config import config
+from recommender import (EmbeddingModel, HybridRanker, RecommendationModel, catalog_fingerprint, load_or_fit_model,
+                         rows_per_block)
+
+_worker = {}
+
+
+def _init_worker(model_dir, engine, category_codes, scope, quality, weights, pool_factor):
+    model = RecommendationModel.load(model_dir, mmap=True)
+    if engine in ('lsa', 'lsa-ivf'):
+        model.embedding = EmbeddingModel.load_or_fit(model, model_dir, config.LSA_DIMENSIONS,
+                                                     engine == 'lsa-ivf', config.IVF_PROBES, mmap=True)
+    _worker['model'] = model
+    _worker['codes'] = category_codes
+    _worker['scope'] = scope
+    _worker['ranker'] = HybridRanker(*quality, weights, pool_factor) if quality is not None else None
+
+
+def _export_block(args):
+    """Similar-title ids and similarity scores for rows start:stop"""
+    start, stop, k = args
+    model, codes = _worker['model'], _worker['codes']
+    rows = np.arange(start, stop)
+
+    if _worker['scope'] == 'same':
+        mask = codes[np.newaxis, :] == codes[rows, np.newaxis]
+    elif _worker['scope'] == 'all':
+        mask = None
+    else:
+        mask = codes == CATEGORIES.index(_worker['scope'])
+
+    id_lists, scores = model.similar_batch(rows, k, mask, _worker['ranker'], with_scores=True)
+    return start, id_lists, scores
+
+
+class NDJSONWriter:
+    """One JSON object per line"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, records):
+        for record in records:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """One Parquet row group per block (needs pyarrow)"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ('row', pa.int32()),
+            ('title', pa.string()),
+            ('category', pa.string()),
+            ('similar', pa.list_(pa.string())),
+            ('similar_rows', pa.list_(pa.int32())),
+            ('similarity', pa.list_(pa.float32()))
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records):
+        self.writer.write_table(self.pa.Table.from_pylist(records, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def export(output, k=10, scope='same', block_size=None, workers=1, hybrid=True):
+    """
+    Write similar titles for every catalog row to output (.ndjson or .parquet).
+    Each worker holds one block of dense scores (and, for scope 'same', a
+    block of row masks); by default blocks are sized to the per-process
+    SCORE_BLOCK_BYTES budget, so memory grows with workers, not catalog size.
+    """
+    source_paths = [config.HOLLYWOOD_DATASET, config.BOLLYWOOD_DATASET, config.WEBSERIES_DATASET]
+    catalog = load_catalog(source_paths, config.COMPILED_DIR)
+    if catalog.empty:
+        print("❌ No datasets found")
+        return False
+
+    # Fit (or reuse) the model once here; workers memory-map the saved copy
+    engine = config.RECOMMENDER_ENGINE
+    load_or_fit_model(catalog, source_paths, 'catalog', config.MODEL_CACHE_DIR, engine=engine,
+                      lsa_dims=config.LSA_DIMENSIONS, ivf_probes=config.IVF_PROBES)
+    model_dir = os.path.join(config.MODEL_CACHE_DIR, f"catalog-{catalog_fingerprint(source_paths)}")
+
+    titles = catalog['title'].to_numpy(dtype=object)
+    categories = catalog['category'].astype(str).to_numpy(dtype=object)
+    category_codes = catalog['category'].cat.codes.to_numpy()
+    quality = quality_features(catalog) if hybrid else None
+
+    writer = ParquetWriter(output) if output.endswith('.parquet') else NDJSONWriter(output)
+    n_rows = len(catalog)
+    block_size = block_size or rows_per_block(n_rows)
+    blocks = [(start, min(start + block_size, n_rows), k) for start in range(0, n_rows, block_size)]
+    initargs = (model_dir, engine, category_codes, scope, quality, config.HYBRID_WEIGHTS, config.HYBRID_POOL_FACTOR)
+
+    print(f"Exporting {k} similar titles for {n_rows} rows ({scope}) with {workers} worker(s)...")
+    start_time = time.perf_counter()
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            # map() yields blocks in order as they finish; each is written and dropped
+            for start, id_lists, scores in pool.map(_export_block, blocks):
+                writer.write([
+                    {
+                        'row': row,
+                        'title': titles[row],
+                        'category': categories[row],
+                        'similar': titles[ids].tolist(),
+                        'similar_rows': ids.tolist(),
+                        'similarity': [round(score, 4) for score in row_scores.tolist()]
+                    }
+                    for row, ids, row_scores in zip(range(start, start + len(id_lists)), id_lists, scores)
+                ])
+                done += len(id_lists)
+                elapsed = time.perf_counter() - start_time
+                sys.stdout.write(f"\r   {done:,}/{n_rows:,} rows ({done / n_rows:.0%})  {done / elapsed:,.0f} rows/sec")
+                sys.stdout.flush()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\n✅ Wrote {output} in {elapsed:.1f}s ({n_rows / elapsed:,.0f} rows/sec)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export similar titles for every catalog row')
+    parser.add_argument('output', help='output file: .ndjson / .jsonl, or .parquet (needs pyarrow)')
+    parser.add_argument('--k', type=int, default=10, help='similar titles per row')
+    parser.add_argument('--scope', choices=['same', 'all', *CATEGORIES], default='same',
+                        help="'same' keeps each title's own category, 'all' spans every category")
+    parser.add_argument('--block-size', type=int,
+                        help='rows scored per matrix product (default: sized to a 256 MB budget per worker)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--no-hybrid', action='store_true', help='rank by similarity only')
+    args = parser.parse_args()
+
+    export(args.output, args.k, args.scope, args.block_size, args.workers, not args.no_hybrid)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for the OMDb API
+Answers ?t=<title> lookups with canned data so the app and its caches can be
+exercised without network access or API quota
+
+Run standalone and point the app at it:
+    python fake_omdb.py --port 8765
+    OMDB_BASE_URL=http://127.0.0.1:8765/ python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOMDbServer:
+    """
+    Threaded HTTP server mimicking OMDb's title lookup
+    titles: titles that exist (None means every title exists)
+    latency: seconds to sleep before each response
+    error_rate: fraction of requests answered with HTTP 500
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, titles=None, latency=0.0, error_rate=0.0, seed=None):
+        self.titles = {t.casefold() for t in titles} if titles is not None else None
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if fail:
+            handler.send_response(500)
+            handler.end_headers()
+            return
+
+        title = parse_qs(urlparse(handler.path).query).get('t', [''])[0]
+        if self.titles is None or title.casefold() in self.titles:
+            body = {
+                'Response': 'True',
+                'Title': title,
+                'Poster': f"https://posters.example/{abs(hash(title)) % 100000}.jpg",
+                'Actors': 'Actor One, Actor Two, Actor Three',
+                'Director': 'Some Director',
+                'imdbID': f"tt{abs(hash(title)) % 10000000:07d}",
+                'Runtime': '120 min',
+                'Released': '01 Jan 2000',
+                'Plot': f"Plot of {title}.",
+                'Rated': 'PG-13',
+                'Awards': 'N/A'
+            }
+        else:
+            body = {'Response': 'False', 'Error': 'Movie not found!'}
+
+        payload = json.dumps(body).encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake OMDb API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of HTTP 500s')
+    args = parser.parse_args()
+
+    server = FakeOMDbServer(port=args.port, latency=args.latency, error_rate=args.error_rate)
+    print(f"Fake OMDb listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
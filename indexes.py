@@ -0,0 +1,301 @@
+"""
+Lookup indexes over the unified catalog
+Built once at load time so routes never scan the catalog per request
+"""
+
+import hashlib
+import os
+import shutil
+import unicodedata
+
+import numpy as np
+
+
+def normalize_title(title):
+    """Case-folded, NFKC-normalized title with whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFKC', str(title)).casefold().split())
+
+
+class TitleIndex:
+    """
+    Hash index from title to catalog row id
+    Duplicate titles resolve to the first row in catalog order
+    (Hollywood, Bollywood, Web Series, then file order)
+    """
+
+    def __init__(self, titles):
+        self.exact = {}
+        self.normalized = {}
+        for row, title in enumerate(titles):
+            self.exact.setdefault(title, row)
+            self.normalized.setdefault(normalize_title(title), row)
+
+    def lookup(self, title):
+        """Row id for an exact title, or None"""
+        return self.exact.get(title)
+
+    def resolve(self, query):
+        """Row id for an exact title, falling back to a case/space-insensitive match"""
+        row = self.exact.get(query)
+        if row is None:
+            row = self.normalized.get(normalize_title(query))
+        return row
+
+
+def _title_hash(text):
+    """Stable 64-bit hash (Python's hash() differs between worker processes)"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _sorted_hashes(keys):
+    hashes = np.fromiter((_title_hash(key) for key in keys), dtype=np.uint64, count=len(keys))
+    rows = np.arange(len(keys), dtype=np.int32)
+    order = np.lexsort((rows, hashes))
+    return hashes[order], rows[order]
+
+
+class MappedTitleIndex:
+    """
+    TitleIndex kept as sorted 64-bit title hashes plus row ids, stored in
+    .npy files that every worker process memory-maps. Lookups are a binary
+    search, checked against the catalog title so hash collisions never match.
+    """
+
+    FILES = ['exact_hashes', 'exact_rows', 'normalized_hashes', 'normalized_rows']
+
+    def __init__(self, titles, exact_hashes, exact_rows, normalized_hashes, normalized_rows):
+        self.titles = titles
+        self.exact_hashes = exact_hashes
+        self.exact_rows = exact_rows
+        self.normalized_hashes = normalized_hashes
+        self.normalized_rows = normalized_rows
+
+    @classmethod
+    def build(cls, titles):
+        titles = np.asarray(titles, dtype=object)
+        exact = _sorted_hashes([str(title) for title in titles])
+        normalized = _sorted_hashes([normalize_title(title) for title in titles])
+        return cls(titles, *exact, *normalized)
+
+    def save(self, directory):
+        tmp_dir = f"{directory}.tmp{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name in self.FILES:
+            np.save(os.path.join(tmp_dir, name + '.npy'), getattr(self, name))
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load_or_build(cls, titles, cache_dir, fingerprint):
+        """Memory-map the index for this catalog fingerprint, building it first if needed"""
+        directory = os.path.join(cache_dir, f"titles-{fingerprint}")
+        if not os.path.exists(directory):
+            os.makedirs(cache_dir, exist_ok=True)
+            cls.build(titles).save(directory)
+            for entry in os.listdir(cache_dir):
+                if entry.startswith('titles-') and not entry.startswith(f"titles-{fingerprint}"):
+                    shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+        arrays = [np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name in cls.FILES]
+        return cls(np.asarray(titles, dtype=object), *arrays)
+
+    @staticmethod
+    def _span(hashes, key):
+        value = np.uint64(_title_hash(key))
+        return np.searchsorted(hashes, value, 'left'), np.searchsorted(hashes, value, 'right')
+
+    def rows(self, title):
+        """Every row id carrying this exact title"""
+        start, stop = self._span(self.exact_hashes, title)
+        return [int(row) for row in self.exact_rows[start:stop] if self.titles[row] == title]
+
+    def lookup(self, title):
+        """Row id for an exact title, or None"""
+        rows = self.rows(title)
+        return rows[0] if rows else None
+
+    def resolve(self, query):
+        """Row id for an exact title, falling back to a case/space-insensitive match"""
+        row = self.lookup(query)
+        if row is None:
+            key = normalize_title(query)
+            start, stop = self._span(self.normalized_hashes, key)
+            for candidate in self.normalized_rows[start:stop]:
+                if normalize_title(self.titles[candidate]) == key:
+                    return int(candidate)
+        return row
+
+
+def _ngrams(text, prefix=False):
+    """Distinct bigrams and trigrams of text; prefix adds start-anchored grams"""
+    if prefix:
+        text = '\x02' + text
+    grams = {text[i:i + 3] for i in range(len(text) - 2)}
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class SearchIndex:
+    """
+    Inverted n-gram index over titles for substring and prefix search
+    Rows are renumbered by rank (highest score first), so every posting list
+    is already in ranking order and results need no sorting
+    """
+
+    def __init__(self, titles, scores):
+        scores = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=0.0)
+        self.rows_by_rank = np.argsort(-scores, kind='stable').astype(np.int32)
+
+        titles = list(titles)
+        self.normalized = [normalize_title(titles[row]) for row in self.rows_by_rank]
+
+        postings = {}
+        for rank, text in enumerate(self.normalized):
+            for gram in _ngrams(text, prefix=True):
+                postings.setdefault(gram, []).append(rank)
+        self.postings = {gram: np.array(ranks, dtype=np.int32) for gram, ranks in postings.items()}
+
+    def _candidates(self, text, prefix):
+        """Ranks whose titles contain every n-gram of text, best first"""
+        if len(text) < 2:
+            return range(len(self.normalized))
+
+        grams = _ngrams(text, prefix)
+        if len(text) >= 3:
+            # Trigrams are far more selective; bigrams only matter for 2-char queries
+            grams = {gram for gram in grams if len(gram) == 3}
+        lists = sorted((self.postings.get(gram) for gram in grams), key=lambda p: 0 if p is None else len(p))
+        if lists[0] is None:
+            return []
+
+        result = lists[0]
+        for posting in lists[1:]:
+            result = np.intersect1d(result, posting, assume_unique=True)
+            if not len(result):
+                break
+        return result
+
+    def search(self, query, limit=20, prefix=False):
+        """Catalog row ids of titles containing (or starting with) query, best first (limit=None: all)"""
+        text = normalize_title(query)
+        if not text or (limit is not None and limit < 1):
+            return []
+
+        matches = []
+        for rank in self._candidates(text, prefix):
+            title = self.normalized[rank]
+            if title.startswith(text) if prefix else text in title:
+                matches.append(int(self.rows_by_rank[rank]))
+                if limit is not None and len(matches) >= limit:
+                    break
+        return matches
+
+    def suggest(self, query, limit=10):
+        """Type-ahead: prefix matches first, then other substring matches"""
+        rows = self.search(query, limit, prefix=True)
+        if len(rows) < limit:
+            seen = set(rows)
+            rows += [row for row in self.search(query, limit) if row not in seen][:limit - len(rows)]
+        return rows
+
+
+class FacetIndex:
+    """
+    Genre / category / rating facets for the filter page
+    Each facet value maps to a sorted array of catalog row ids, ratings are
+    presorted so a minimum rating is a binary search, and filters combine
+    by intersecting row id arrays
+    """
+
+    RATING_THRESHOLDS = [9, 8, 7, 6, 5]
+
+    def __init__(self, genres, categories, ratings):
+        self.n_rows = len(ratings)
+
+        genre_lists = [[g for g in str(text).split(', ') if g] for text in genres]
+        self.genres = sorted({g for names in genre_lists for g in names})
+        self._genre_lookup = {g.casefold(): i for i, g in enumerate(self.genres)}
+        genre_rows = [[] for _ in self.genres]
+        for row, names in enumerate(genre_lists):
+            for g in names:
+                genre_rows[self._genre_lookup[g.casefold()]].append(row)
+        self.genre_rows = [np.unique(np.array(rows, dtype=np.int32)) for rows in genre_rows]
+        # Multi-hot genre bits, 8 genres per byte (packbits order: genre i is bit 7 - i % 8)
+        self.genre_bits = np.zeros((self.n_rows, (len(self.genres) + 7) // 8), dtype=np.uint8)
+        for i, rows in enumerate(self.genre_rows):
+            self.genre_bits[rows, i // 8] |= np.uint8(1 << (7 - i % 8))
+
+        categories = [str(c) for c in categories]
+        self.categories = list(dict.fromkeys(categories))
+        codes = {c: i for i, c in enumerate(self.categories)}
+        self.category_codes = np.array([codes[c] for c in categories], dtype=np.int8)
+        self.category_rows = {c: np.flatnonzero(self.category_codes == i).astype(np.int32)
+                              for i, c in enumerate(self.categories)}
+
+        self.ratings = np.asarray(ratings, dtype=np.float64)
+        rated = np.flatnonzero(~np.isnan(self.ratings))
+        order = np.argsort(self.ratings[rated], kind='stable')
+        self.rating_order = rated[order].astype(np.int32)
+        self.sorted_ratings = self.ratings[self.rating_order]
+
+    def genre_ids(self, genre):
+        """Row ids tagged with genre (case-insensitive); an empty array if the genre is unknown"""
+        i = self._genre_lookup.get(genre.strip().casefold())
+        return self.genre_rows[i] if i is not None else np.empty(0, dtype=np.int32)
+
+    def rating_ids(self, min_rating):
+        """Row ids rated at least min_rating, via binary search"""
+        start = np.searchsorted(self.sorted_ratings, min_rating, side='left')
+        return np.sort(self.rating_order[start:])
+
+    def _select(self, genre=None, category=None, min_rating=None):
+        sets = []
+        if genre:
+            sets.append(self.genre_ids(genre))
+        if category:
+            sets.append(self.category_rows.get(category, np.empty(0, dtype=np.int32)))
+        if min_rating is not None:
+            sets.append(self.rating_ids(min_rating))
+        if not sets:
+            return None  # no filter: every row
+
+        sets.sort(key=len)
+        rows = sets[0]
+        for other in sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def filter(self, genre=None, category=None, min_rating=None):
+        """Sorted catalog row ids matching every given filter"""
+        rows = self._select(genre, category, min_rating)
+        return np.arange(self.n_rows, dtype=np.int32) if rows is None else rows
+
+    def _bit_counts(self, genre_bits):
+        """Rows with each genre bit set, one pass per bit position"""
+        counts = np.zeros(genre_bits.shape[1] * 8, dtype=np.int64)
+        for bit in range(8):
+            counts[bit::8] = ((genre_bits >> (7 - bit)) & 1).sum(axis=0)
+        return counts[:len(self.genres)]
+
+    def counts(self, genre=None, category=None, min_rating=None):
+        """
+        Live counts per facet value. Each facet is counted with the other
+        facets' filters applied, so the numbers show what picking that
+        value would return.
+        """
+        rows = self._select(category=category, min_rating=min_rating)
+        genre_bits = self.genre_bits if rows is None else self.genre_bits[rows]
+        genre_counts = self._bit_counts(genre_bits)
+
+        rows = self._select(genre=genre, min_rating=min_rating)
+        codes = self.category_codes if rows is None else self.category_codes[rows]
+        category_counts = np.bincount(codes, minlength=len(self.categories))
+
+        rows = self._select(genre=genre, category=category)
+        ratings = self.ratings if rows is None else self.ratings[rows]
+        return {
+            'genre': dict(zip(self.genres, genre_counts.tolist())),
+            'category': dict(zip(self.categories, category_counts.tolist())),
+            'min_rating': {t: int((ratings >= t).sum()) for t in self.RATING_THRESHOLDS}
+        }
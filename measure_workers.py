@@ -0,0 +1,89 @@
+"""
+Worker memory comparison for MODEL_MMAP
+Starts N processes that each import the app the way a multi-worker WSGI
+server would (no preloading), warms them with recommendation requests and
+reports the summed RSS and PSS (proportional set size: shared pages are
+split between the processes mapping them). Linux only.
+
+Usage:
+    python measure_workers.py --workers 1 4 8
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+from urllib.parse import quote
+
+from fake_omdb import FakeOMDbServer
+
+
+def _read_memory(pid):
+    """(rss, pss) in bytes from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1]) * 1024
+    return values['Rss:'], values['Pss:']
+
+
+def _worker(ready, done):
+    import app
+
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = 'measure'
+
+    # Touch the model the way live traffic would over time
+    model = app.snapshots.current.model
+    if model is not None:
+        for row in range(0, model.matrix.shape[0], max(model.matrix.shape[0] // 150, 1)):
+            model.similarity_scores(row)
+    titles = app.snapshots.current.catalog['title']
+    for title in titles.iloc[::max(len(titles) // 20, 1)]:
+        client.get(f"/movie/{quote(title, safe='')}")
+
+    ready.set()
+    done.wait()
+
+
+def measure(workers, mmap):
+    os.environ['MODEL_MMAP'] = '1' if mmap else '0'
+    ctx = mp.get_context('spawn')
+    done = ctx.Event()
+    procs = []
+    for _ in range(workers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=_worker, args=(ready, done))
+        proc.start()
+        procs.append((proc, ready))
+
+    for _, ready in procs:
+        ready.wait()
+    rss, pss = map(sum, zip(*(_read_memory(proc.pid) for proc, _ in procs)))
+
+    done.set()
+    for proc, _ in procs:
+        proc.join()
+    return rss, pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare worker memory with and without MODEL_MMAP')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    with FakeOMDbServer() as omdb:
+        os.environ['OMDB_BASE_URL'] = omdb.url
+        os.environ['OMDB_WARM_TITLES'] = '0'
+        print(f"{'workers':>7} {'mode':>9} {'total RSS':>10} {'total PSS':>10} {'PSS/worker':>11}")
+        for workers in args.workers:
+            for mmap in (False, True):
+                rss, pss = measure(workers, mmap)
+                mode = 'mmap' if mmap else 'in-memory'
+                print(f"{workers:>7} {mode:>9} {rss / 2**20:>8.0f}MB {pss / 2**20:>8.0f}MB {pss / workers / 2**20:>9.0f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Request instrumentation in Prometheus text format
+Per-route latency histograms plus named timing spans (dataset access,
+similarity scoring, OMDb fetches) inside each request. Recording is a few
+perf_counter() calls and a few locked counter updates, cheap enough to
+leave on.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+# Seconds; tuned for page renders (ms) up to slow OMDb batches (s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ['+Inf'], series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+def render_counters(prefix, values, help_texts):
+    """Prometheus lines for a dict of plain counters, e.g. OMDbClient.stats()"""
+    lines = []
+    for key, value in values.items():
+        name = f"{prefix}_{key}_total"
+        lines += [f"# HELP {name} {help_texts.get(key, key)}", f"# TYPE {name} counter", f"{name} {value}"]
+    return lines
+
+
+def render_gauges(prefix, values, help_texts):
+    """Prometheus lines for a dict of current values, e.g. ProfileStore.stats()"""
+    lines = []
+    for key, value in values.items():
+        name = f"{prefix}_{key}"
+        lines += [f"# HELP {name} {help_texts.get(key, key)}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return lines
+
+
+class RequestMetrics:
+    """
+    Flask hooks that time every request by route, plus span() for timing
+    parts of a request. With server_timing=True each response carries a
+    Server-Timing header with the request's spans.
+    """
+
+    def __init__(self, server_timing=False):
+        self.server_timing = server_timing
+        self.requests = Histogram('http_request_duration_seconds', 'Request latency by route',
+                                  ('route', 'method'))
+        self.responses = Counter('http_requests_total', 'Requests by route and status',
+                                 ('route', 'method', 'status'))
+        self.spans = Histogram('app_span_duration_seconds', 'Time spent in each part of a request',
+                               ('span',))
+
+    def init_app(self, app):
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_spans = {}
+
+    def _finish(self, response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        self.requests.observe((route, request.method), elapsed)
+        self.responses.inc((route, request.method, str(response.status_code)))
+
+        spans = g.pop('metrics_spans', {})
+        for name, seconds in spans.items():
+            self.spans.observe((name,), seconds)
+        if self.server_timing:
+            timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in spans.items()]
+            timings.append(f"total;dur={elapsed * 1000:.1f}")
+            response.headers['Server-Timing'] = ', '.join(timings)
+        return response
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time a block as part of the current request (no-op outside one)
+        Repeated spans with the same name add up
+        """
+        if not has_request_context():
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            spans = g.get('metrics_spans')
+            if spans is not None:
+                spans[name] = spans.get(name, 0.0) + time.perf_counter() - start
+
+    def render(self):
+        lines = self.requests.render() + self.responses.render() + self.spans.render()
+        return '\n'.join(lines) + '\n'
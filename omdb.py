@@ -0,0 +1,390 @@
+"""
+OMDb API client with a two-level metadata cache
+An in-process LRU sits in front of a SQLite store, so lookups survive
+restarts and "movie not found" answers are remembered too. Upstream calls
+go through a token-bucket rate limiter, concurrent misses for one title
+share a single call, and a background warm-up can prefill the cache.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Returned by OMDbCache.get() when nothing usable is cached
+MISSING = object()
+
+
+class RateLimited(Exception):
+    """No request slot freed up within the client's queue timeout"""
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average with bursts of up to
+    `burst` (a rate of 0 or less means no limit). Callers queue in acquire()
+    until a token is free; pause() holds everyone back, e.g. to back off
+    after upstream errors.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None, reserve=0):
+        """
+        Take a token, waiting for one if needed; False if that would take
+        longer than timeout. reserve leaves that many tokens for other callers
+        (low-priority work such as the warm-up only runs with headroom).
+        """
+        needed = 1 + min(reserve, self.burst - 1)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.rate <= 0:
+                    # Unlimited: only a pause holds callers back
+                    if now >= self._paused_until:
+                        return True
+                    delay = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if now >= self._paused_until and self._tokens >= needed:
+                        self._tokens -= 1
+                        return True
+                    delay = max(self._paused_until - now, (needed - self._tokens) / self.rate)
+            if deadline is not None and now + delay > deadline:
+                return False
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class OMDbCache:
+    """Title -> parsed OMDb details, with TTL expiry and LRU eviction"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, negative_ttl=24 * 3600, max_entries=2048, purge_every=1000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        # Expired rows are deleted at startup and every purge_every writes,
+        # so the SQLite store stays bounded by what is still fresh
+        self.purge_every = purge_every
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS omdb_cache '
+            '(key TEXT PRIMARY KEY, payload TEXT, expires_at REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS omdb_cache_expires ON omdb_cache (expires_at)')
+        self._db.commit()
+        self.purge_expired()
+
+    @staticmethod
+    def _key(title):
+        return ' '.join(str(title).split()).casefold()
+
+    def get(self, title):
+        """Cached details, None for a cached "not found", or MISSING"""
+        key = self._key(title)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            row = self._db.execute(
+                'SELECT payload, expires_at FROM omdb_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self._memory.pop(key, None)
+                self.misses += 1
+                return MISSING
+
+            value = json.loads(row[0]) if row[0] is not None else None
+            self._remember(key, row[1], value)
+            self.hits += 1
+            return value
+
+    def set(self, title, value):
+        """Store details, or None to remember that OMDb has no such title"""
+        key = self._key(title)
+        expires_at = time.time() + (self.ttl if value is not None else self.negative_ttl)
+        payload = json.dumps(value) if value is not None else None
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._db.execute(
+                'INSERT OR REPLACE INTO omdb_cache (key, payload, expires_at) VALUES (?, ?, ?)',
+                (key, payload, expires_at)
+            )
+            self._db.commit()
+            self._writes += 1
+            purge = self.purge_every and self._writes % self.purge_every == 0
+        if purge:
+            self.purge_expired()
+
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self):
+        """Delete expired rows from the SQLite store; returns how many went"""
+        with self._lock:
+            deleted = self._db.execute('DELETE FROM omdb_cache WHERE expires_at <= ?', (time.time(),)).rowcount
+            self._db.commit()
+            return deleted
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'memory_entries': len(self._memory)
+            }
+
+
+def parse_omdb_response(data):
+    """Extract the fields the templates use from a successful OMDb response"""
+    poster = data.get('Poster') if data.get('Poster') != 'N/A' else None
+
+    # Parse cast (Actors field)
+    cast = data.get('Actors', '').split(', ')[:5] if data.get('Actors') != 'N/A' else []
+
+    # Get IMDB link
+    imdb_id = data.get('imdbID')
+    imdb_link = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
+
+    # Get runtime (convert "142 min" to 142)
+    runtime_str = data.get('Runtime', 'N/A')
+    runtime = int(runtime_str.split()[0]) if runtime_str != 'N/A' and runtime_str.split()[0].isdigit() else None
+
+    return {
+        'poster': poster,
+        'cast': cast,
+        'director': data.get('Director', 'N/A'),
+        'imdb_link': imdb_link,
+        'runtime': runtime,
+        'release_date': data.get('Released', 'N/A'),
+        'plot': data.get('Plot', ''),
+        'rated': data.get('Rated', 'N/A'),
+        'awards': data.get('Awards', 'N/A'),
+        'trailer': None  # OMDb doesn't provide trailers
+    }
+
+
+class OMDbClient:
+    """
+    Cached OMDb lookups by title, singly or as a concurrent batch. With a
+    limiter, a request waits at most queue_timeout seconds for a slot, and
+    consecutive failures pause all requests for backoff seconds, doubling
+    each time up to max_backoff.
+    """
+
+    def __init__(self, api_key, base_url, cache=None, timeout=5, max_workers=8, limiter=None,
+                 queue_timeout=5, backoff=1.0, max_backoff=60.0):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.cache = cache
+        self.timeout = timeout
+        self.limiter = limiter
+        self.queue_timeout = queue_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._failures = 0
+
+        # Single flight: cache key -> Future of the one upstream call for that title
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+        # One pooled session shared by all worker threads keeps connections alive
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='omdb')
+
+        # Upstream call counters for /metrics
+        self.counters = {'requests': 0, 'errors': 0, 'timeouts': 0, 'deadline_exceeded': 0,
+                         'rate_limited': 0, 'coalesced': 0, 'warmed': 0}
+        self._counter_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._counter_lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        """Upstream call counters plus the cache's hit/miss counts"""
+        with self._counter_lock:
+            stats = dict(self.counters)
+        if self.cache is not None:
+            cache_stats = self.cache.stats()
+            stats['cache_hits'] = cache_stats['hits']
+            stats['cache_misses'] = cache_stats['misses']
+        return stats
+
+    def fetch(self, movie_title, background=False):
+        """
+        Query OMDb directly. Returns parsed details, or None when OMDb says
+        the title does not exist. Network and quota errors are raised, as is
+        RateLimited when no request slot frees up in time.
+        """
+        if self.limiter is not None:
+            # Background work leaves half the burst for page requests
+            reserve = self.limiter.burst // 2 if background else 0
+            if not self.limiter.acquire(timeout=self.queue_timeout, reserve=reserve):
+                raise RateLimited(f"no OMDb request slot within {self.queue_timeout}s")
+        params = {
+            'apikey': self.api_key,
+            't': movie_title,
+            'plot': 'full'
+        }
+        self._count('requests')
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get('Response') == 'True':
+            return parse_omdb_response(data)
+        if 'not found' in data.get('Error', '').lower():
+            return None
+        raise RuntimeError(data.get('Error', 'Unexpected OMDb response'))
+
+    def get_details(self, movie_title):
+        """Details for a title, served from the cache when possible"""
+        if self.cache is not None:
+            cached = self.cache.get(movie_title)
+            if cached is not MISSING:
+                return cached
+        details = self._submit(movie_title).result()
+        return None if details is MISSING else details
+
+    def get_cached(self, movie_title, default=None):
+        """Details for a title if cached (None for a cached "not found"), else default; never calls OMDb"""
+        if self.cache is None:
+            return default
+        cached = self.cache.get(movie_title)
+        return default if cached is MISSING else cached
+
+    def _submit(self, movie_title, background=False):
+        """Future for the title's upstream call, joining one already in flight"""
+        key = OMDbCache._key(movie_title)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._count('coalesced')
+                return future
+            future = self._in_flight[key] = self._pool.submit(self._fetch_and_store, movie_title, background)
+        # Stored in the cache before the future completes, so later misses find it there
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._in_flight_lock:
+            self._in_flight.pop(key, None)
+
+    def _fetch_and_store(self, movie_title, background=False):
+        """Details (None: OMDb has no such title), or MISSING when the lookup failed"""
+        try:
+            details = self.fetch(movie_title, background)
+        except RateLimited as e:
+            self._count('rate_limited')
+            print(f"OMDb API Rate limited: {e}")
+            return MISSING
+        except requests.Timeout as e:
+            self._count('timeouts')
+            self._failed()
+            print(f"OMDb API Timeout: {e}")
+            return MISSING
+        except Exception as e:
+            # Transient failures are not cached so the next request retries
+            self._count('errors')
+            self._failed()
+            print(f"OMDb API Error: {e}")
+            return MISSING
+
+        with self._counter_lock:
+            self._failures = 0
+        if self.cache is not None:
+            self.cache.set(movie_title, details)
+        return details
+
+    def _failed(self):
+        """Back off exponentially while upstream calls keep failing"""
+        if self.limiter is None:
+            return
+        with self._counter_lock:
+            self._failures += 1
+            delay = min(self.backoff * 2 ** (self._failures - 1), self.max_backoff)
+        self.limiter.pause(delay)
+
+    def start_warm_up(self, titles):
+        """
+        Fetch the uncached titles in a background thread, one at a time and
+        at low priority, so the first visitors find them in the cache
+        """
+        thread = threading.Thread(target=self._warm_up, args=(list(titles),), name='omdb-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def _warm_up(self, titles):
+        for title in titles:
+            if self.get_cached(title, MISSING) is MISSING:
+                try:
+                    self._submit(title, background=True).result()
+                except RuntimeError:
+                    # The worker pool shut down (interpreter exit)
+                    return
+                self._count('warmed')
+
+    def get_details_batch(self, titles, deadline=3.0, missing=None):
+        """
+        Details for many titles at once, as a dict keyed by title. Cache
+        misses are fetched concurrently; anything still in flight when the
+        deadline passes, or whose lookup failed, maps to `missing` (an
+        in-flight fetch carries on and fills the cache for the next request).
+        """
+        results = {}
+        pending = {}
+        for title in dict.fromkeys(titles):
+            cached = self.cache.get(title) if self.cache is not None else MISSING
+            if cached is not MISSING:
+                results[title] = cached
+            else:
+                pending[title] = self._submit(title)
+
+        # Titles differing only in case or spacing can share one future
+        done, _ = wait(set(pending.values()), timeout=deadline)
+        late = 0
+        for title, future in pending.items():
+            if future in done:
+                details = future.result()
+                results[title] = missing if details is MISSING else details
+            else:
+                results[title] = missing
+                late += 1
+        if late:
+            self._count('deadline_exceeded', late)
+        return results
@@ -0,0 +1,79 @@
+"""
+Cursor pagination over precomputed sort orders
+Each sort order is a permutation of the catalog rows, built once per
+catalog snapshot together with its inverse (row -> position). A result set
+is stored as the sorted positions of its rows in the chosen order, so any
+page is a binary search plus a slice. The cursor is the last position shown
+plus the catalog version, which keeps paging stable however deep it goes.
+"""
+
+import base64
+
+import numpy as np
+
+SORT_KEYS = ('default', 'popularity', 'rating', 'year', 'title')
+
+
+def _descending(values):
+    """Row order by descending value, missing values last, ties in catalog order"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.argsort(-np.nan_to_num(values, nan=-np.inf), kind='stable').astype(np.int32)
+
+
+class SortOrders:
+    """Row orders for every SORT_KEYS entry, plus row -> position lookups"""
+
+    def __init__(self, catalog, popularity):
+        n_rows = len(catalog)
+        titles = catalog['title'].astype(str).str.casefold().to_numpy(dtype=object)
+        self.orders = {
+            # Source order: what the category pages have always shown first
+            'default': np.arange(n_rows, dtype=np.int32),
+            # Vote percentile, the same ranking search results use
+            'popularity': _descending(popularity),
+            'rating': _descending(catalog['rating'].astype('float64')),
+            'year': _descending(catalog['year'].astype('float64')),
+            'title': np.argsort(titles, kind='stable').astype(np.int32)
+        }
+        self.positions = {}
+        for key, order in self.orders.items():
+            positions = np.empty(n_rows, dtype=np.int32)
+            positions[order] = np.arange(n_rows, dtype=np.int32)
+            self.positions[key] = positions
+
+    def positions_of(self, rows, sort):
+        """A result set (any row ids) as sorted positions in the given order"""
+        return np.sort(self.positions[sort][np.asarray(rows, dtype=np.int64)])
+
+    def rows_at(self, positions, sort):
+        return self.orders[sort][positions]
+
+
+def encode_cursor(version, position):
+    """Opaque, URL-safe cursor for 'after this position' in a catalog version"""
+    return base64.urlsafe_b64encode(f"{version}.{position}".encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, version):
+    """
+    Position to continue after, or -1 to start at the beginning (no cursor,
+    or one from a catalog version that has since been reloaded).
+    Raises ValueError for a malformed cursor.
+    """
+    if not cursor:
+        return -1
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        cursor_version, position = text.rsplit('.', 1)
+        position = int(position)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"malformed cursor: {cursor!r}") from e
+    return position if cursor_version == version else -1
+
+
+def page(positions, after, size):
+    """The next `size` positions after `after`, and the last one shown if more follow (else None)"""
+    start = np.searchsorted(positions, after, side='right')
+    shown = positions[start:start + size]
+    more = start + size < len(positions)
+    return shown, (int(shown[-1]) if more else None)
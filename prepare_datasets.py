@@ -1,55 +1,172 @@
 """
 Dataset Preparation Helper Script
 This script helps you prepare and validate your movie datasets
+
+Usage:
+    python prepare_datasets.py            # check datasets, offer samples
+    python prepare_datasets.py check --chunk-size 200000 --workers 3
+    python prepare_datasets.py compile    # build the binary catalog the app memory-maps
+    python prepare_datasets.py --memory-report   # bytes per catalog column, full vs compact
 """
 
+import argparse
 import pandas as pd
+import numpy as np
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def check_dataset(filepath, dataset_name):
-    """Check if dataset exists and has required columns"""
+from catalog import (RELEASE_DATE_FORMAT, build_catalog, compact_catalog, compile_catalog, memory_report,
+                     parse_number, read_datasets)
+from config import config
+
+# Source columns the catalog reads as numbers (each dataset uses some of them)
+NUMERIC_COLUMNS = ['vote_average', 'rating', 'vote_count', 'votes', 'popularity', 'runtime', 'Duration (in Min)']
+REQUIRED_COLUMNS = ['title', 'overview']
+CHUNK_SIZE = 100000  # rows per chunk: memory stays bounded whatever the file size
+
+
+def _title_hashes(titles):
+    """64-bit hashes of titles normalized like indexes.normalize_title (8 bytes a row)"""
+    text = titles.astype('string').str.normalize('NFKC').str.casefold()
+    normalized = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return pd.util.hash_pandas_object(normalized.dropna(), index=False).to_numpy()
+
+
+def profile_dataset(filepath, chunk_size=CHUNK_SIZE):
+    """
+    Stream a CSV in chunks and profile it: row count, nulls per column,
+    values the catalog has to clean up or cannot parse, and duplicate
+    titles. Runs in a worker process, so it returns a plain dict.
+    """
+    start = time.perf_counter()
+    report = {'path': filepath, 'rows': 0, 'columns': [], 'nulls': {}, 'coercion': {}, 'sample': None}
+    hashes = []
+    
+    # Everything read as text so the raw values can be checked
+    for chunk in pd.read_csv(filepath, dtype=str, chunksize=chunk_size):
+        if report['sample'] is None:
+            report['columns'] = chunk.columns.tolist()
+            report['nulls'] = dict.fromkeys(report['columns'], 0)
+            report['sample'] = chunk.iloc[0].dropna().to_dict() if len(chunk) else {}
+        report['rows'] += len(chunk)
+        
+        for col, count in chunk.isna().sum().items():
+            report['nulls'][col] += int(count)
+        
+        for col in [col for col in NUMERIC_COLUMNS if col in chunk.columns]:
+            raw = chunk[col].dropna()
+            # "16,441" or "124 min": not a plain number, but the catalog cleans it up
+            not_numeric = pd.to_numeric(raw, errors='coerce').isna()
+            unparseable = parse_number(raw[not_numeric]).isna()
+            _add_coercion(report, col, raw, not_numeric, unparseable)
+        
+        if 'release_date' in chunk.columns:
+            raw = chunk['release_date'].dropna()
+            unparseable = pd.to_datetime(raw, format=RELEASE_DATE_FORMAT, errors='coerce').isna()
+            _add_coercion(report, 'release_date', raw, unparseable, unparseable)
+        
+        if 'title' in chunk.columns:
+            hashes.append(_title_hashes(chunk['title']))
+    
+    report['duplicates'] = _duplicate_titles(filepath, hashes, chunk_size)
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def _add_coercion(report, col, raw, not_numeric, unparseable):
+    stats = report['coercion'].setdefault(col, {'not_numeric': 0, 'unparseable': 0, 'examples': []})
+    stats['not_numeric'] += int(not_numeric.sum())
+    stats['unparseable'] += int(unparseable.sum())
+    if len(stats['examples']) < 3:
+        examples = raw[not_numeric].drop_duplicates().head(3 - len(stats['examples']))
+        stats['examples'] += examples.tolist()
+
+
+def _duplicate_titles(filepath, hashes, chunk_size, limit=10):
+    """Duplicate title counts, naming the most repeated from a title-only second pass"""
+    if not hashes:
+        return {'titles': 0, 'rows': 0, 'examples': []}
+    unique, counts = np.unique(np.concatenate(hashes), return_counts=True)
+    repeated = counts > 1
+    result = {'titles': int(repeated.sum()), 'rows': int((counts[repeated] - 1).sum()), 'examples': []}
+    if not result['titles']:
+        return result
+    
+    order = np.argsort(-counts[repeated], kind='stable')[:limit]
+    top_counts = dict(zip(unique[repeated][order].tolist(), counts[repeated][order].tolist()))
+    names = {}
+    for chunk in pd.read_csv(filepath, dtype=str, usecols=['title'], chunksize=chunk_size):
+        titles = chunk['title'].dropna()
+        for value, title in zip(_title_hashes(titles).tolist(), titles.tolist()):
+            if value in top_counts:
+                names.setdefault(value, title)
+        if len(names) == len(top_counts):
+            break
+    result['examples'] = [(names.get(value, '?'), count) for value, count in top_counts.items()]
+    return result
+
+
+def print_profile(report, dataset_name):
+    """Print a profile_dataset() report; True if the dataset is usable"""
+    filepath, rows = report['path'], report['rows']
     print(f"\n{'='*50}")
     print(f"Checking {dataset_name}...")
     print(f"{'='*50}")
+    print(f"✅ {filepath} found!")
+    print(f"   Total movies: {rows:,}")
+    print(f"   Columns: {', '.join(report['columns'])}")
+    print(f"   Profiled in {report['seconds']:.2f}s ({rows / max(report['seconds'], 1e-9):,.0f} rows/sec)")
+    
+    # Check required columns
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in report['columns']]
+    if missing_cols:
+        print(f"⚠️  Missing required columns: {', '.join(missing_cols)}")
+    else:
+        print("✅ All required columns present")
+    
+    # Check for missing values
+    print("\n   Missing values:")
+    for col, missing in report['nulls'].items():
+        if missing > 0:
+            print(f"   - {col}: {missing:,} ({missing/rows*100:.1f}%)")
+    
+    # Values that are not plain numbers / dates
+    if any(stats['not_numeric'] for stats in report['coercion'].values()):
+        print("\n   Type coercion:")
+        for col, stats in report['coercion'].items():
+            if stats['not_numeric']:
+                examples = ', '.join(repr(example) for example in stats['examples'])
+                print(f"   - {col}: {stats['not_numeric']:,} not plain values (e.g. {examples}), "
+                      f"{stats['unparseable']:,} unparseable (become missing)")
     
+    duplicates = report['duplicates']
+    if duplicates['titles']:
+        print(f"\n   Duplicate titles: {duplicates['titles']:,} titles on {duplicates['rows']:,} extra rows")
+        for title, count in duplicates['examples']:
+            print(f"   - {title} ({count}x)")
+    
+    # Show sample data
+    print("\n   Sample movie:")
+    sample = report['sample'] or {}
+    print(f"   Title: {sample.get('title', 'N/A')}")
+    if 'genre' in report['columns']:
+        print(f"   Genre: {sample.get('genre', 'N/A')}")
+    if 'vote_average' in report['columns']:
+        print(f"   Rating: {sample.get('vote_average', 'N/A')}")
+    
+    return not missing_cols
+
+
+def check_dataset(filepath, dataset_name, chunk_size=CHUNK_SIZE):
+    """Check if dataset exists and has required columns"""
     if not os.path.exists(filepath):
-        print(f"❌ {filepath} NOT FOUND")
+        print(f"\n❌ {filepath} NOT FOUND")
         print(f"   Please add {filepath} to the project folder")
         return False
     
     try:
-        df = pd.read_csv(filepath)
-        print(f"✅ {filepath} found!")
-        print(f"   Total movies: {len(df)}")
-        print(f"   Columns: {', '.join(df.columns.tolist())}")
-        
-        # Check required columns
-        required_cols = ['title', 'overview']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        
-        if missing_cols:
-            print(f"⚠️  Missing required columns: {', '.join(missing_cols)}")
-        else:
-            print(f"✅ All required columns present")
-        
-        # Check for missing values
-        print(f"\n   Missing values:")
-        for col in df.columns:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                print(f"   - {col}: {missing} ({missing/len(df)*100:.1f}%)")
-        
-        # Show sample data
-        print(f"\n   Sample movie:")
-        sample = df.iloc[0]
-        print(f"   Title: {sample.get('title', 'N/A')}")
-        if 'genre' in df.columns:
-            print(f"   Genre: {sample.get('genre', 'N/A')}")
-        if 'vote_average' in df.columns:
-            print(f"   Rating: {sample.get('vote_average', 'N/A')}")
-        
-        return True
-        
+        return print_profile(profile_dataset(filepath, chunk_size), dataset_name)
     except Exception as e:
         print(f"❌ Error reading {filepath}: {str(e)}")
         return False
@@ -145,8 +262,8 @@ def create_sample_webseries_dataset():
     print("   You can replace this with a real Web Series dataset later.")
 
 
-def validate_all_datasets():
-    """Validate all datasets"""
+def validate_all_datasets(chunk_size=CHUNK_SIZE, workers=None):
+    """Validate all datasets, profiling the files in parallel worker processes"""
     print("\n" + "="*60)
     print("🎬 MOVIE RECOMMENDATION SYSTEM - DATASET CHECKER")
     print("="*60)
@@ -157,9 +274,28 @@ def validate_all_datasets():
         ('webseries.csv', 'Web Series')
     ]
     
-    results = {}
-    for filepath, name in datasets:
-        results[name] = check_dataset(filepath, name)
+    start = time.perf_counter()
+    present = [filepath for filepath, _ in datasets if os.path.exists(filepath)]
+    workers = workers or min(len(present), os.cpu_count() or 1) or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {filepath: pool.submit(profile_dataset, filepath, chunk_size) for filepath in present}
+        
+        results = {}
+        total_rows = 0
+        for filepath, name in datasets:
+            if filepath not in futures:
+                results[name] = check_dataset(filepath, name)
+                continue
+            try:
+                report = futures[filepath].result()
+            except Exception as e:
+                print(f"\n❌ Error reading {filepath}: {str(e)}")
+                results[name] = False
+                continue
+            results[name] = print_profile(report, name)
+            total_rows += report['rows']
+    elapsed = time.perf_counter() - start
+    print(f"\n   Profiled {total_rows:,} rows in {elapsed:.2f}s ({total_rows / elapsed:,.0f} rows/sec, {workers} worker(s))")
     
     # Summary
     print("\n" + "="*60)
@@ -181,12 +317,103 @@ def validate_all_datasets():
     print("\n" + "="*60)
 
 
+def compile_datasets():
+    """Validate and normalize the CSVs into the binary columnar catalog"""
+    print("\n" + "="*60)
+    print("📦 COMPILING DATASETS")
+    print("="*60)
+    
+    datasets = [
+        (config.HOLLYWOOD_DATASET, 'Hollywood Movies'),
+        (config.BOLLYWOOD_DATASET, 'Bollywood Movies'),
+        (config.WEBSERIES_DATASET, 'Web Series')
+    ]
+    
+    start = time.perf_counter()
+    frames = []
+    for filepath, name in datasets:
+        if not os.path.exists(filepath):
+            if filepath == config.HOLLYWOOD_DATASET:
+                print(f"❌ {filepath} is required to compile the catalog")
+                return False
+            print(f"⚠️  {filepath} not found, compiling without {name}")
+            frames.append(pd.DataFrame())
+            continue
+        
+        df = pd.read_csv(filepath)
+        missing_cols = [col for col in ['title', 'overview'] if col not in df.columns]
+        if missing_cols:
+            print(f"❌ {filepath} is missing required columns: {', '.join(missing_cols)}")
+            return False
+        print(f"✅ {filepath}: {len(df)} rows")
+        frames.append(df)
+    
+    catalog = build_catalog(*frames)
+    
+    # Report values that could not be coerced to the catalog's typed columns
+    print("\n   Missing after normalization:")
+    for col in ['rating', 'votes', 'year', 'runtime']:
+        missing = catalog[col].isna().groupby(catalog['category'], observed=True).sum()
+        counts = ', '.join(f"{category}: {count}" for category, count in missing.items())
+        print(f"   - {col}: {counts}")
+    
+    compile_catalog(catalog, config.COMPILED_DIR, [filepath for filepath, _ in datasets])
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Compiled {len(catalog)} titles into {config.COMPILED_DIR} in {elapsed:.1f}s")
+    print("   The app memory-maps it at startup until a CSV changes.")
+    return True
+
+
+def print_memory_report():
+    """Bytes per catalog column in the full and the compact (COMPACT_CATALOG=1) form"""
+    source_paths = [config.HOLLYWOOD_DATASET, config.BOLLYWOOD_DATASET, config.WEBSERIES_DATASET]
+    if not os.path.exists(config.HOLLYWOOD_DATASET):
+        print(f"❌ {config.HOLLYWOOD_DATASET} is required for the memory report")
+        return False
+    
+    catalog = build_catalog(*read_datasets(*source_paths))
+    compact, overviews = compact_catalog(catalog)
+    before = memory_report(catalog)
+    after = memory_report(compact, overviews)
+    
+    print(f"Catalog memory: {len(catalog)} titles\n")
+    print(f"   {'column':<20}{'dtype':<16}{'bytes':>12}  {'compact':<16}{'bytes':>12}{'saved':>8}")
+    for name in catalog.columns:
+        dtype = 'text column' if name == 'overview' else str(compact[name].dtype)
+        saved = 1 - after[name] / before[name] if before[name] else 0.0
+        print(f"   {name:<20}{str(catalog[name].dtype):<16}{before[name]:>12,}  {dtype:<16}{after[name]:>12,}"
+              f"{saved:>8.0%}")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    print(f"   {'total':<20}{'':<16}{total_before:>12,}  {'':<16}{total_after:>12,}"
+          f"{1 - total_after / total_before:>8.0%}")
+    print("\n   Overviews are held out-of-line (memory-mapped once compiled) and only read")
+    print("   by the detail page, the export and the vectorizer. Enable with COMPACT_CATALOG=1.")
+    return True
+
+
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description='Prepare and validate movie datasets')
+    parser.add_argument('mode', nargs='?', choices=['check', 'compile'], default='check',
+                        help="'check' validates datasets interactively, 'compile' builds the binary catalog")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows read per chunk when checking')
+    parser.add_argument('--workers', type=int, help='processes checking files in parallel (default: one per file)')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='print bytes per catalog column before and after compaction, then exit')
+    args = parser.parse_args()
+    
+    if args.memory_report:
+        print_memory_report()
+        return
+    
+    if args.mode == 'compile':
+        compile_datasets()
+        return
+    
     print("Movie Recommendation System - Dataset Preparation Tool\n")
     
     # Check if datasets exist
-    validate_all_datasets()
+    validate_all_datasets(args.chunk_size, args.workers)
     
     # Offer to create sample datasets
     print("\n" + "="*60)
@@ -205,7 +432,7 @@ def main():
     
     # Final validation
     if not all([os.path.exists('bollywood.csv'), os.path.exists('webseries.csv')]):
-        validate_all_datasets()
+        validate_all_datasets(args.chunk_size, args.workers)
     
     print("\n✅ Dataset preparation complete!")
     print("\nNext steps:")
@@ -0,0 +1,131 @@
+"""
+Per-user taste profiles for the "for you" feed
+A profile is a decayed running sum of the vectors of the titles a user has
+opened, so recent views count most. A view only touches the opened title's
+non-zero terms: the decay is one shared scale factor rather than a pass over
+every stored weight. Profiles live server-side in a bounded LRU (the session
+cookie only carries the username), with a bitmask of the rows already seen.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+class UserProfile:
+    """Profile weights (stored divided by scale) plus seen rows for one catalog version"""
+
+    def __init__(self, version, n_rows, history_size=50):
+        self.version = version
+        self.weights = {}  # dimension id -> weight / scale
+        self.scale = 1.0
+        self.seen = bytearray((n_rows + 7) // 8)
+        self.history = deque(maxlen=history_size)  # titles, to rebuild after a catalog reload
+
+    def has_seen(self, row):
+        return bool(self.seen[row >> 3] & (1 << (row & 7)))
+
+    def add(self, row, indices, values, decay, max_terms):
+        """Fold one viewed row's vector in: O(nnz of that vector)"""
+        self.seen[row >> 3] |= 1 << (row & 7)
+        # profile = decay * profile + item, with the decay kept in self.scale
+        self.scale *= decay
+        if self.scale < 1e-6:
+            self._rescale()
+        inverse = 1.0 / self.scale
+        weights = self.weights
+        for index, value in zip(indices.tolist(), values.tolist()):
+            weights[index] = weights.get(index, 0.0) + value * inverse
+        # Long histories: keep the heaviest terms, pruned in bulk once the profile doubles
+        if len(weights) > 2 * max_terms:
+            kept = sorted(weights.items(), key=lambda item: abs(item[1]), reverse=True)[:max_terms]
+            self.weights = dict(kept)
+
+    def _rescale(self):
+        self.weights = {index: weight * self.scale for index, weight in self.weights.items()}
+        self.scale = 1.0
+
+    def vector(self):
+        """(dimension ids, weights) of the profile"""
+        indices = np.fromiter(self.weights.keys(), dtype=np.int64, count=len(self.weights))
+        values = np.fromiter(self.weights.values(), dtype=np.float32, count=len(self.weights))
+        return indices, values * np.float32(self.scale)
+
+    def seen_mask(self, n_rows):
+        """Boolean array over the catalog rows, True where the user has been"""
+        bits = np.unpackbits(np.frombuffer(bytes(self.seen), dtype=np.uint8), bitorder='little')
+        return bits[:n_rows].astype(bool)
+
+
+class ProfileStore:
+    """
+    Thread-safe LRU of UserProfiles keyed by username. A profile built for an
+    older catalog snapshot is rebuilt from its title history on first use.
+    """
+
+    def __init__(self, max_users=10000, decay=0.9, history_size=50, max_terms=2000):
+        self.max_users = max_users
+        self.decay = decay
+        self.history_size = history_size
+        self.max_terms = max_terms
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _profile(self, user, snap):
+        """The user's profile for this snapshot (caller holds the lock), or None"""
+        profile = self._profiles.get(user)
+        if profile is None:
+            return None
+        self._profiles.move_to_end(user)
+        if profile.version != snap.version:
+            # Row and term ids changed with the catalog: replay the history
+            rebuilt = UserProfile(snap.version, len(snap.catalog), self.history_size)
+            for title in profile.history:
+                row = snap.title_index.lookup(title)
+                if row is not None:
+                    self._add(rebuilt, snap, row, title)
+            profile = self._profiles[user] = rebuilt
+        return profile
+
+    def _add(self, profile, snap, row, title):
+        if profile.has_seen(row):
+            return
+        indices, values = snap.model.item_vector(row)
+        profile.add(row, indices, values, self.decay, self.max_terms)
+        profile.history.append(title)
+
+    def record_view(self, user, snap, row):
+        """Add a title the user opened (repeat views of a title count once)"""
+        if snap.model is None:
+            return
+        with self._lock:
+            profile = self._profile(user, snap)
+            if profile is None:
+                profile = self._profiles[user] = UserProfile(snap.version, len(snap.catalog), self.history_size)
+                while len(self._profiles) > self.max_users:
+                    self._profiles.popitem(last=False)
+            self._add(profile, snap, row, snap.catalog['title'].iat[row])
+
+    def recommend(self, user, snap, num_recommendations, ranker=None, same_categories=True):
+        """
+        Row ids for the user's feed, best first, never a title they have
+        opened; same_categories keeps to the categories they have browsed
+        """
+        if snap.model is None:
+            return []
+        with self._lock:
+            profile = self._profile(user, snap)
+            if profile is None or not profile.weights:
+                return []
+            indices, values = profile.vector()
+            seen = profile.seen_mask(len(snap.catalog))
+        mask = None
+        if same_categories:
+            categories = np.unique(snap.catalog['category'].to_numpy()[seen])
+            mask = np.logical_or.reduce([snap.masks[category] for category in categories])
+        return snap.model.similar_to_vector(indices, values, num_recommendations, mask, ranker, exclude=seen)
+
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._profiles)}
@@ -0,0 +1,692 @@
+"""
+Content-based recommendation model
+Fits one TF-IDF model (shared vocabulary) over the overviews of the whole
+catalog and caches it on disk, keyed by a fingerprint of the source CSVs.
+Category filters are boolean row masks applied to the score vector at
+query time.
+
+Run this file directly to precompute the top-K neighbor table:
+    python recommender.py --k 50 --workers 4
+or to measure how closely the LSA engine matches exact TF-IDF:
+    python recommender.py --recall lsa --k 10
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+# Batch scoring holds a dense rows x catalog block of scores at a time; blocks
+# are sized so that block (plus masking and top-k temporaries) fits this budget
+SCORE_BLOCK_BYTES = 256 << 20
+SCORE_BYTES = 24  # per score: float32 scores, negated copy, int64 argpartition, mask
+MAX_BLOCK_ROWS = 1024
+
+
+def file_fingerprint(filepath):
+    """Return a short SHA-1 digest of the file contents"""
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def rows_per_block(n_columns, budget=SCORE_BLOCK_BYTES):
+    """Rows per scoring block so a block of scores against n_columns items stays within budget bytes"""
+    return int(max(1, min(MAX_BLOCK_ROWS, budget // (SCORE_BYTES * max(n_columns, 1)))))
+
+
+def top_k(scores, k):
+    """Column ids of the k largest scores in each row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    # argpartition is O(n) per row; only the k winners get sorted
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1)
+
+
+def top_k_dense(vectors, rows, k, candidates=None, with_scores=False):
+    """
+    Top-k neighbors (excluding self) of the given rows under dot-product
+    similarity of dense vectors; optionally restricted to candidate ids
+    (with_scores: also their similarities)
+    """
+    pool = vectors if candidates is None else vectors[candidates]
+    sims = vectors[rows] @ pool.T
+    if candidates is None:
+        sims[np.arange(len(rows)), rows] = -np.inf
+    else:
+        sims[np.asarray(rows)[:, np.newaxis] == candidates[np.newaxis, :]] = -np.inf
+    idx = top_k(sims, k)
+    ids = idx if candidates is None else candidates[idx]
+    return (ids, np.take_along_axis(sims, idx, axis=1)) if with_scores else ids
+
+
+def masked_top_k(scores, row, k, mask=None):
+    """Top-k ids of one score vector, excluding row (one id or several) and anything outside mask"""
+    scores[row] = -np.inf
+    if mask is not None:
+        scores[~mask] = -np.inf
+    idx = top_k(scores[np.newaxis, :], k)[0]
+    return idx[np.isfinite(scores[idx])]
+
+
+def top_k_block(matrix, start, stop, k):
+    """Top-k neighbors (excluding self) for rows start:stop of matrix"""
+    sims = (matrix[start:stop] @ matrix.T).toarray()
+    sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+    idx = top_k(sims, k)
+    scores = np.take_along_axis(sims, idx, axis=1)
+    return idx.astype(np.int32), scores.astype(np.float32)
+
+
+_worker_matrix = None
+
+
+def _init_worker(matrix):
+    global _worker_matrix
+    _worker_matrix = matrix
+
+
+def _worker_block(args):
+    start, stop, k = args
+    return start, top_k_block(_worker_matrix, start, stop, k)
+
+
+class NeighborTable:
+    """Precomputed top-K neighbor ids and scores for every row"""
+
+    def __init__(self, indices, scores):
+        self.indices = indices
+        self.scores = scores
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    @classmethod
+    def build(cls, matrix, k=50, block_size=None, workers=1):
+        """
+        Compute the table in row blocks (sized to SCORE_BLOCK_BYTES per
+        process by default), optionally across worker processes
+        """
+        n_rows = matrix.shape[0]
+        block_size = block_size or rows_per_block(n_rows)
+        k = min(k, max(n_rows - 1, 0))
+        indices = np.empty((n_rows, k), dtype=np.int32)
+        scores = np.empty((n_rows, k), dtype=np.float32)
+        blocks = [(start, min(start + block_size, n_rows), k) for start in range(0, n_rows, block_size)]
+
+        if workers > 1 and len(blocks) > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(matrix,)) as pool:
+                results = pool.map(_worker_block, blocks)
+                for start, (block_idx, block_scores) in results:
+                    indices[start:start + len(block_idx)] = block_idx
+                    scores[start:start + len(block_idx)] = block_scores
+        else:
+            for start, stop, _ in blocks:
+                indices[start:stop], scores[start:stop] = top_k_block(matrix, start, stop, k)
+
+        return cls(indices, scores)
+
+    def save(self, directory):
+        for name, array in [('neighbor_indices.npy', self.indices), ('neighbor_scores.npy', self.scores)]:
+            # Write then rename, so workers that have the old table mapped keep a valid file
+            path = os.path.join(directory, name)
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, array)
+            os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        """Load the table from directory, or return None if it was never built"""
+        path = os.path.join(directory, 'neighbor_indices.npy')
+        if not os.path.exists(path):
+            return None
+        mmap_mode = 'r' if mmap else None
+        return cls(np.load(path, mmap_mode=mmap_mode),
+                   np.load(os.path.join(directory, 'neighbor_scores.npy'), mmap_mode=mmap_mode))
+
+
+class TermCounts:
+    """
+    Raw term counts for one dataset's overviews. They are cached per CSV
+    fingerprint, so a catalog rebuild only re-tokenizes the datasets whose
+    file changed and then merges the counts into a new TF-IDF model.
+    """
+
+    def __init__(self, vocabulary, counts):
+        self.vocabulary = vocabulary
+        self.counts = counts
+
+    @classmethod
+    def count(cls, overviews):
+        # Imported here: scikit-learn takes about a second to import and is
+        # not needed when the model comes from the on-disk cache
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        overviews = list(overviews)
+        try:
+            vectorizer = CountVectorizer(stop_words='english', dtype=np.float32)
+            counts = vectorizer.fit_transform(overviews).tocsr()
+        except ValueError:
+            # Nothing but stop words (or no text at all)
+            return cls([], sp.csr_matrix((len(overviews), 0), dtype=np.float32))
+        return cls(vectorizer.get_feature_names_out().tolist(), counts)
+
+    def save(self, directory):
+        tmp_dir = f"{directory}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, 'data.npy'), self.counts.data)
+        np.save(os.path.join(tmp_dir, 'indices.npy'), self.counts.indices)
+        np.save(os.path.join(tmp_dir, 'indptr.npy'), self.counts.indptr)
+        with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump({'shape': list(self.counts.shape), 'terms': self.vocabulary}, f)
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'vocabulary.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(directory, name)) for name in ('data.npy', 'indices.npy', 'indptr.npy')]
+        return cls(meta['terms'], sp.csr_matrix(tuple(arrays), shape=tuple(meta['shape'])))
+
+    @classmethod
+    def load_or_count(cls, overviews, source_path, cache_dir):
+        """Counts for a dataset, reused from cache_dir while its CSV is unchanged"""
+        directory = os.path.join(cache_dir, f"counts-{file_fingerprint(source_path)}")
+        if os.path.exists(os.path.join(directory, 'vocabulary.json')):
+            try:
+                return cls.load(directory)
+            except Exception as e:
+                print(f"Term count cache error ({directory}): {e}")
+        counts = cls.count(overviews)
+        os.makedirs(cache_dir, exist_ok=True)
+        counts.save(directory)
+        return counts
+
+
+class RecommendationModel:
+    """TF-IDF vectors for every catalog row (rows are L2 normalized)"""
+
+    def __init__(self, vocabulary, idf, matrix, neighbors=None):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.matrix = matrix
+        self.neighbors = neighbors
+        self.embedding = None  # set when the LSA engine is selected
+
+    @classmethod
+    def fit(cls, overviews):
+        """Fit TF-IDF on an iterable of overview strings"""
+        return cls.from_counts([TermCounts.count(overviews)])
+
+    @classmethod
+    def from_counts(cls, parts):
+        """
+        TF-IDF over the rows of several TermCounts stacked in order. The
+        vocabularies are merged and IDF is recomputed over all rows, giving
+        the same result as TfidfVectorizer (smooth idf, l2 norm) on the
+        concatenated texts.
+        """
+        vocabulary = sorted(set().union(*(part.vocabulary for part in parts)))
+        position = {term: i for i, term in enumerate(vocabulary)}
+
+        blocks = []
+        for part in parts:
+            remap = np.array([position[term] for term in part.vocabulary], dtype=np.int32)
+            counts = part.counts
+            blocks.append(sp.csr_matrix((counts.data, remap[counts.indices], counts.indptr),
+                                        shape=(counts.shape[0], len(vocabulary))))
+        counts = sp.vstack(blocks, format='csr', dtype=np.float32)
+        counts.sort_indices()
+
+        n_rows = counts.shape[0]
+        df = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = (np.log((1 + n_rows) / (1 + df)) + 1).astype(np.float32)
+
+        data = counts.data * idf[counts.indices]
+        # Row of each stored value; bincount gives empty rows (anywhere) a zero norm
+        row_lengths = np.diff(counts.indptr)
+        row_ids = np.repeat(np.arange(n_rows), row_lengths)
+        row_norms = np.sqrt(np.bincount(row_ids, weights=data.astype(np.float64) ** 2, minlength=n_rows))
+        data /= np.repeat(np.where(row_norms > 0, row_norms, 1), row_lengths).astype(np.float32)
+
+        matrix = sp.csr_matrix((data.astype(np.float32), counts.indices, counts.indptr), shape=counts.shape)
+        return cls(vocabulary, idf, matrix)
+
+    def save(self, directory):
+        """Write vocabulary, idf and the CSR arrays into directory"""
+        # Per-process temp dir: several server workers may fit the same model at once
+        tmp_dir = f"{directory}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, 'data.npy'), self.matrix.data)
+        np.save(os.path.join(tmp_dir, 'indices.npy'), self.matrix.indices)
+        np.save(os.path.join(tmp_dir, 'indptr.npy'), self.matrix.indptr)
+        np.save(os.path.join(tmp_dir, 'idf.npy'), self.idf)
+        with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump({'shape': list(self.matrix.shape), 'terms': self.vocabulary}, f)
+
+        # Swap the finished directory in so a crash never leaves a half-written
+        # model; if another worker got there first, keep its copy
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap=False):
+        """
+        Load a model previously written with save(). With mmap=True the CSR
+        arrays and neighbor table are memory-mapped read-only, so every
+        worker process shares one copy through the OS page cache.
+        """
+        with open(os.path.join(directory, 'vocabulary.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+
+        mmap_mode = 'r' if mmap else None
+        data = np.load(os.path.join(directory, 'data.npy'), mmap_mode=mmap_mode)
+        indices = np.load(os.path.join(directory, 'indices.npy'), mmap_mode=mmap_mode)
+        indptr = np.load(os.path.join(directory, 'indptr.npy'), mmap_mode=mmap_mode)
+        idf = np.load(os.path.join(directory, 'idf.npy'), mmap_mode=mmap_mode)
+        matrix = sp.csr_matrix((data, indices, indptr), shape=tuple(meta['shape']), copy=False)
+        return cls(meta['terms'], idf, matrix, NeighborTable.load(directory, mmap))
+
+    def similarity_scores(self, row):
+        """Cosine similarity of one row against every row in the dataset"""
+        # Rows are already L2 normalized, so the dot product is the cosine
+        return (self.matrix[row] @ self.matrix.T).toarray().ravel()
+
+    def batch_scores(self, rows):
+        """Dense similarity of each given row against every row: one matrix product"""
+        if self.embedding is not None:
+            return self.embedding.vectors[rows] @ self.embedding.vectors.T
+        return (self.matrix[rows] @ self.matrix.T).toarray()
+
+    def similar_batch(self, rows, num_recommendations, mask=None, ranker=None, block_size=None, with_scores=False):
+        """
+        similar() for many rows, scored in blocks of one sparse matrix-matrix
+        product each (sized to SCORE_BLOCK_BYTES by default, so memory stays
+        bounded on large catalogs). mask is one boolean array shared by all
+        rows, or a 2-D array with one mask per row. Returns a list of id
+        arrays (and a list of their similarity scores if with_scores).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        block_size = block_size or rows_per_block(self.matrix.shape[0])
+        pool = num_recommendations * ranker.pool_factor if ranker is not None else num_recommendations
+        results, result_scores = [], []
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            scores = self.batch_scores(block)
+            scores[np.arange(len(block)), block] = -np.inf
+            if mask is not None:
+                block_mask = mask if mask.ndim == 1 else mask[start:start + block_size]
+                np.copyto(scores, -np.inf, where=~block_mask)
+
+            ids = top_k(scores, pool)
+            if ranker is not None:
+                ids = ranker.rerank(ids, np.take_along_axis(scores, ids, axis=1), num_recommendations)
+            sims = np.take_along_axis(scores, ids, axis=1)
+            finite = np.isfinite(sims)
+            results.extend(row_ids[row_finite] for row_ids, row_finite in zip(ids, finite))
+            result_scores.extend(row_sims[row_finite] for row_sims, row_finite in zip(sims, finite))
+        return (results, result_scores) if with_scores else results
+
+    def similar_to_set(self, rows, num_recommendations, mask=None, ranker=None):
+        """Row ids most similar to a seed set of rows on average, excluding the seeds"""
+        scores = self.batch_scores(rows).mean(axis=0)
+        if ranker is None:
+            return masked_top_k(scores, rows, num_recommendations, mask)
+        candidates = masked_top_k(scores, rows, num_recommendations * ranker.pool_factor, mask)
+        return ranker.rerank(candidates, scores[candidates], num_recommendations)
+
+    def item_vector(self, row):
+        """One row as (dimension ids, weights) in the space scores are computed in"""
+        if self.embedding is not None:
+            vector = np.asarray(self.embedding.vectors[row])
+            return np.arange(len(vector)), vector
+        start, stop = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        return np.asarray(self.matrix.indices[start:stop]), np.asarray(self.matrix.data[start:stop])
+
+    def similar_to_vector(self, indices, weights, num_recommendations, mask=None, ranker=None, exclude=None):
+        """
+        Row ids scoring highest against a query vector given as (dimension
+        ids, weights), e.g. a user profile built from item_vector()s.
+        exclude is an optional boolean array of rows never to return.
+        """
+        width = self.embedding.vectors.shape[1] if self.embedding is not None else self.matrix.shape[1]
+        query = np.zeros(width, dtype=np.float32)
+        query[indices] = weights
+        # Cosine against the rows: the query's own length does not matter
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query /= norm
+        scores = self.embedding.vectors @ query if self.embedding is not None else self.matrix @ query
+        if exclude is not None:
+            scores[exclude] = -np.inf
+
+        no_rows = np.empty(0, dtype=np.int64)
+        if ranker is None:
+            return masked_top_k(scores, no_rows, num_recommendations, mask)
+        candidates = masked_top_k(scores, no_rows, num_recommendations * ranker.pool_factor, mask)
+        return ranker.rerank(candidates, scores[candidates], num_recommendations)
+
+    def similar(self, row, num_recommendations, mask=None, ranker=None):
+        """
+        Row ids of the most similar items, best first, excluding row itself
+        mask is an optional boolean array over all rows; only rows where it
+        is True can be returned. A HybridRanker re-ranks a larger set of the
+        most similar rows by similarity blended with item quality.
+        """
+        if ranker is None:
+            return self._similar_scored(row, num_recommendations, mask)[0]
+
+        pool = num_recommendations * ranker.pool_factor
+        if self.embedding is None and self.neighbors is not None:
+            # Stay on the precomputed neighbor path when it is available
+            pool = max(num_recommendations, min(pool, self.neighbors.k))
+        # The pool's similarities come along with it, so nothing is scored twice
+        candidates, similarities = self._similar_scored(row, pool, mask)
+        return ranker.rerank(candidates, similarities, num_recommendations)
+
+    def _similar_scored(self, row, num_recommendations, mask=None):
+        """similar() without re-ranking, plus the similarity of each returned row"""
+        if self.embedding is not None:
+            return self.embedding.similar(row, num_recommendations, mask, with_scores=True)
+        if self.neighbors is not None and num_recommendations <= self.neighbors.k:
+            candidates, scores = self.neighbors.indices[row], self.neighbors.scores[row]
+            if mask is not None:
+                keep = mask[candidates]
+                candidates, scores = candidates[keep], scores[keep]
+            # Too few of the precomputed neighbors pass the mask: score everything
+            if len(candidates) >= num_recommendations:
+                return candidates[:num_recommendations], scores[:num_recommendations]
+
+        scores = self.similarity_scores(row)
+        candidates = masked_top_k(scores, row, num_recommendations, mask)
+        return candidates, scores[candidates]
+
+
+class HybridRanker:
+    """
+    Blends content similarity with precomputed item quality:
+        score = w_similarity * similarity + w_rating * rating + w_popularity * popularity
+    The quality part is folded into one prior per row at load time, so
+    re-ranking candidates is a single vectorized expression
+    """
+
+    def __init__(self, rating, popularity, weights, pool_factor=4):
+        self.similarity_weight = np.float32(weights.get('similarity', 1.0))
+        self.prior = (np.float32(weights.get('rating', 0.0)) * rating
+                      + np.float32(weights.get('popularity', 0.0)) * popularity).astype(np.float32)
+        self.pool_factor = pool_factor
+
+    def rerank(self, candidates, similarities, num_recommendations):
+        """
+        The best num_recommendations candidates by hybrid score; works on one
+        candidate list or a 2-D array with one list per row
+        """
+        scores = self.similarity_weight * similarities + self.prior[candidates]
+        order = np.argsort(-scores, axis=-1, kind='stable')[..., :num_recommendations]
+        return np.take_along_axis(candidates, order, axis=-1)
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest neighbor index over dense vectors
+    Vectors are clustered with k-means; a query only scores the members of
+    the n_probe clusters whose centroids are closest to it
+    """
+
+    def __init__(self, centroids, members, offsets, n_probe=8):
+        self.centroids = centroids
+        self.members = members
+        self.offsets = offsets
+        self.n_probe = n_probe
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, seed=0):
+        from sklearn.cluster import MiniBatchKMeans
+
+        n_lists = n_lists or max(int(4 * np.sqrt(len(vectors))), 1)
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3, batch_size=4096)
+        labels = kmeans.fit_predict(vectors)
+        members = np.argsort(labels, kind='stable').astype(np.int32)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=n_lists), out=offsets[1:])
+        # Unit-length centroids so probing ranks clusters by cosine, like the vectors
+        centroids = kmeans.cluster_centers_
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        return cls(centroids.astype(np.float32), members, offsets)
+
+    def candidates(self, vector, min_count=0):
+        """
+        Row ids in the n_probe clusters nearest to vector, probing further
+        clusters if needed to return at least min_count rows
+        """
+        sizes = np.diff(self.offsets)
+        order = np.argsort(-(self.centroids @ vector), kind='stable')
+        covered = np.cumsum(sizes[order])
+        n_probe = max(self.n_probe, int(np.searchsorted(covered, min_count)) + 1)
+        return np.concatenate([self.members[self.offsets[c]:self.offsets[c + 1]] for c in order[:n_probe]])
+
+    def save(self, directory, prefix):
+        for name in ('centroids', 'members', 'offsets'):
+            np.save(os.path.join(directory, f"{prefix}_{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, prefix, n_probe=8, mmap=False):
+        mmap_mode = 'r' if mmap else None
+        arrays = [np.load(os.path.join(directory, f"{prefix}_{name}.npy"), mmap_mode=mmap_mode)
+                  for name in ('centroids', 'members', 'offsets')]
+        return cls(*arrays, n_probe=n_probe)
+
+
+class EmbeddingModel:
+    """
+    Latent-semantic (LSA) engine: the TF-IDF matrix projected to a dense
+    low-rank float32 embedding with TruncatedSVD, rows L2 normalized, so
+    similarity is a dense dot product whose cost no longer depends on the
+    vocabulary size
+    """
+
+    def __init__(self, vectors, ivf=None):
+        self.vectors = vectors
+        self.ivf = ivf
+
+    @classmethod
+    def fit(cls, matrix, dims=128, seed=0):
+        from sklearn.decomposition import TruncatedSVD
+
+        dims = max(min(dims, matrix.shape[1] - 1, matrix.shape[0] - 1), 1)
+        vectors = TruncatedSVD(n_components=dims, random_state=seed).fit_transform(matrix)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return cls((vectors / norms).astype(np.float32))
+
+    @classmethod
+    def load_or_fit(cls, model, directory, dims=128, use_ivf=False, n_probe=8, mmap=False):
+        """Embedding (and optional IVF index) cached next to the TF-IDF model"""
+        path = os.path.join(directory, f"lsa{dims}_vectors.npy")
+        if os.path.exists(path):
+            embedding = cls(np.load(path, mmap_mode='r' if mmap else None))
+        else:
+            embedding = cls.fit(model.matrix, dims)
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, embedding.vectors)
+            os.replace(path + '.tmp', path)
+
+        if use_ivf:
+            prefix = f"lsa{dims}_ivf"
+            if not os.path.exists(os.path.join(directory, f"{prefix}_offsets.npy")):
+                IVFIndex.build(embedding.vectors).save(directory, prefix)
+            embedding.ivf = IVFIndex.load(directory, prefix, n_probe, mmap)
+        return embedding
+
+    def similar(self, row, num_recommendations, mask=None, with_scores=False):
+        """
+        Row ids of the most similar items, best first, excluding row itself
+        (with_scores: also their similarities)
+        """
+        if self.ivf is not None:
+            # +1 because the row itself is usually among the candidates
+            candidates = self.ivf.candidates(self.vectors[row], num_recommendations + 1)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates) > num_recommendations:
+                ids, scores = top_k_dense(self.vectors, [row], num_recommendations, candidates, with_scores=True)
+                return (ids[0], scores[0]) if with_scores else ids[0]
+        if mask is None:
+            ids, scores = top_k_dense(self.vectors, [row], num_recommendations, with_scores=True)
+            return (ids[0], scores[0]) if with_scores else ids[0]
+        scores = self.vectors @ self.vectors[row]
+        ids = masked_top_k(scores, row, num_recommendations, mask)
+        return (ids, scores[ids]) if with_scores else ids
+
+    def similar_many(self, rows, num_recommendations, block_size=1024):
+        """similar() for many rows, scored in blocks of dense matrix products"""
+        rows = np.asarray(rows)
+        k = min(num_recommendations, len(self.vectors) - 1)
+        results = np.empty((len(rows), k), dtype=np.int64)
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            if self.ivf is None:
+                results[start:start + len(block)] = top_k_dense(self.vectors, block, k)
+            else:
+                for i, row in enumerate(block):
+                    results[start + i] = self.similar(row, k)
+        return results
+
+
+def recall_at_k(model, embedding, k=10, sample=500, seed=0):
+    """
+    Mean fraction of the exact TF-IDF top-k neighbors that the embedding
+    engine also returns, over a random sample of rows
+    """
+    n_rows = model.matrix.shape[0]
+    rows = np.random.default_rng(seed).choice(n_rows, size=min(sample, n_rows), replace=False)
+    rows.sort()
+    hits = 0
+    for start in range(0, len(rows), 256):
+        block = rows[start:start + 256]
+        sims = (model.matrix[block] @ model.matrix.T).toarray()
+        sims[np.arange(len(block)), block] = -np.inf
+        exact = top_k(sims, k)
+        approx = embedding.similar_many(block, k)
+        hits += sum(len(np.intersect1d(e, a)) for e, a in zip(exact, approx))
+    return hits / (len(rows) * min(k, n_rows - 1))
+
+
+def catalog_fingerprint(source_paths):
+    """Fingerprint covering several source files (missing files included)"""
+    parts = [file_fingerprint(path) if os.path.exists(path) else '-' for path in source_paths]
+    return hashlib.sha1(':'.join(parts).encode('ascii')).hexdigest()[:16]
+
+
+def load_or_fit_model(catalog, source_paths, name, cache_dir, mmap=False, engine='tfidf', lsa_dims=128, ivf_probes=8,
+                      overviews=None):
+    """
+    Return the model for the catalog, reusing the on-disk copy when the
+    source CSVs are unchanged and fitting (then saving) a fresh one otherwise.
+    engine is 'tfidf' (exact), 'lsa' (dense embedding) or 'lsa-ivf'
+    (embedding plus approximate nearest neighbor index). overviews replaces
+    the catalog's overview column (compact catalogs keep it out-of-line);
+    it is only read when a model has to be fitted.
+    """
+    if catalog.empty:
+        return None
+
+    fingerprint = catalog_fingerprint(source_paths)
+    model = _load_or_fit_tfidf(catalog, source_paths, fingerprint, name, cache_dir, mmap, overviews)
+    if engine in ('lsa', 'lsa-ivf'):
+        model_dir = os.path.join(cache_dir, f"{name}-{fingerprint}")
+        model.embedding = EmbeddingModel.load_or_fit(model, model_dir, lsa_dims, engine == 'lsa-ivf', ivf_probes, mmap)
+    return model
+
+
+def _load_or_fit_tfidf(catalog, source_paths, fingerprint, name, cache_dir, mmap=False, overviews=None):
+    model_dir = os.path.join(cache_dir, f"{name}-{fingerprint}")
+
+    if os.path.exists(os.path.join(model_dir, 'vocabulary.json')):
+        try:
+            return RecommendationModel.load(model_dir, mmap)
+        except Exception as e:
+            print(f"Model cache error ({model_dir}): {e}")
+            shutil.rmtree(model_dir, ignore_errors=True)
+
+    # Term counts are cached per CSV, so only the datasets whose file changed
+    # are re-tokenized; merging them and recomputing IDF is cheap
+    from catalog import category_ranges
+
+    if overviews is None:
+        overviews = catalog['overview'].to_numpy(dtype=object)
+    parts = []
+    for (start, stop), path in zip(category_ranges(catalog).values(), source_paths):
+        if stop > start:
+            texts = [text if isinstance(text, str) else '' for text in overviews[start:stop]]
+            parts.append(TermCounts.load_or_count(texts, path, cache_dir))
+    model = RecommendationModel.from_counts(parts)
+    os.makedirs(cache_dir, exist_ok=True)
+    model.save(model_dir)
+
+    # Drop models and term counts built from older versions of the CSVs
+    current_counts = {f"counts-{file_fingerprint(path)}" for path in source_paths if os.path.exists(path)}
+    for entry in os.listdir(cache_dir):
+        stale_model = entry.startswith(f"{name}-") and not entry.startswith(f"{name}-{fingerprint}")
+        stale_counts = entry.startswith('counts-') and entry not in current_counts
+        if stale_model or stale_counts:
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+
+    # Serve the saved copy in mmap mode so this worker shares pages with the others
+    return RecommendationModel.load(model_dir, mmap) if mmap else model
+
+
+def main():
+    """Build the neighbor table (or report LSA recall) for the whole catalog"""
+    from catalog import load_catalog
+    from config import config
+
+    parser = argparse.ArgumentParser(description='Precompute the top-K neighbor table')
+    parser.add_argument('--k', type=int, default=50, help='neighbors to keep per title')
+    parser.add_argument('--block-size', type=int,
+                        help='rows scored per matrix product (default: sized to a 256 MB budget per worker)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--recall', choices=['lsa', 'lsa-ivf'],
+                        help='instead of building, report recall@k of this engine against exact TF-IDF')
+    args = parser.parse_args()
+
+    source_paths = [config.HOLLYWOOD_DATASET, config.BOLLYWOOD_DATASET, config.WEBSERIES_DATASET]
+    catalog = load_catalog(source_paths, config.COMPILED_DIR)
+
+    if args.recall:
+        model = load_or_fit_model(catalog, source_paths, 'catalog', config.MODEL_CACHE_DIR,
+                                  engine=args.recall, lsa_dims=config.LSA_DIMENSIONS, ivf_probes=config.IVF_PROBES)
+        recall = recall_at_k(model, model.embedding, args.k)
+        print(f"catalog: {args.recall} recall@{args.k} = {recall:.3f}")
+        return
+
+    model = load_or_fit_model(catalog, source_paths, 'catalog', config.MODEL_CACHE_DIR)
+    start = time.perf_counter()
+    table = NeighborTable.build(model.matrix, args.k, args.block_size, args.workers)
+    table.save(os.path.join(config.MODEL_CACHE_DIR, f"catalog-{catalog_fingerprint(source_paths)}"))
+    elapsed = time.perf_counter() - start
+    print(f"catalog: {model.matrix.shape[0]} titles, k={table.k} in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Catalog snapshots with hot reload
+A snapshot holds the catalog DataFrame plus everything derived from it
+(category views and masks, the recommendation model, ranker and lookup
+indexes). Routes read the current snapshot once per request; a rebuild
+happens in a background thread and is swapped in with a single assignment,
+so in-flight requests finish on the snapshot they started with.
+"""
+
+import threading
+import time
+
+from catalog import (category_masks, category_views, check_sources, load_catalog, load_compact_catalog,
+                     popularity_score, quality_features, source_stamps)
+from indexes import FacetIndex, MappedTitleIndex, SearchIndex, TitleIndex
+from pagination import SortOrders
+from recommender import HybridRanker, catalog_fingerprint, load_or_fit_model
+
+
+class CatalogSnapshot:
+    """An immutable catalog version and its derived indexes and model"""
+
+    def __init__(self, catalog, overviews, model, ranker, title_index, search_index, facet_index, sort_orders,
+                 version, stamps):
+        self.catalog = catalog
+        # Overview text by row: the catalog column, or a TextColumn in compact mode
+        self.overviews = overviews
+        self.category_movies = category_views(catalog)
+        self.masks = category_masks(catalog)
+        self.model = model
+        self.ranker = ranker
+        self.title_index = title_index
+        self.search_index = search_index
+        self.facet_index = facet_index
+        self.sort_orders = sort_orders
+        self.version = version
+        self.stamps = stamps
+        self.loaded_at = time.time()
+
+
+def build_snapshot(source_paths, config):
+    """
+    Load the catalog for the source CSVs and build everything the routes
+    need. Raises ValueError for an empty or malformed source, so a reload
+    keeps the old snapshot instead of dropping that category.
+    """
+    # Stamps first: a file changing mid-build then still looks changed afterwards
+    stamps = source_stamps(source_paths)
+    check_sources(source_paths)
+    version = catalog_fingerprint(source_paths)
+
+    # The compiled columnar copy is memory-mapped when fresh, otherwise the CSVs are parsed
+    if config.COMPACT_CATALOG:
+        catalog, overviews = load_compact_catalog(source_paths, config.COMPILED_DIR)
+    else:
+        catalog = load_catalog(source_paths, config.COMPILED_DIR)
+        overviews = catalog['overview'].to_numpy(dtype=object)
+
+    # One TF-IDF model with a shared vocabulary over the whole catalog; term
+    # counts are cached per CSV, so only a changed dataset is re-tokenized
+    model = load_or_fit_model(catalog, source_paths, 'catalog', config.MODEL_CACHE_DIR, config.MODEL_MMAP,
+                              engine=config.RECOMMENDER_ENGINE, lsa_dims=config.LSA_DIMENSIONS,
+                              ivf_probes=config.IVF_PROBES, overviews=overviews)
+
+    # Similarity re-ranked with rating and popularity (None: pure similarity)
+    if config.HYBRID_WEIGHTS.get('rating') or config.HYBRID_WEIGHTS.get('popularity'):
+        ranker = HybridRanker(*quality_features(catalog), config.HYBRID_WEIGHTS, config.HYBRID_POOL_FACTOR)
+    else:
+        ranker = None
+
+    # Title -> catalog row (in mmap mode a hashed copy on disk shared by every worker)
+    if config.MODEL_MMAP:
+        title_index = MappedTitleIndex.load_or_build(catalog['title'], config.MODEL_CACHE_DIR, version)
+    else:
+        title_index = TitleIndex(catalog['title'])
+
+    popularity = popularity_score(catalog)
+    search_index = SearchIndex(catalog['title'], popularity)
+    facet_index = FacetIndex(catalog['genre'], catalog['category'], catalog['rating'])
+    # Row orders for the paginated listings (search ranks by popularity too)
+    sort_orders = SortOrders(catalog, popularity)
+    return CatalogSnapshot(catalog, overviews, model, ranker, title_index, search_index, facet_index, sort_orders,
+                           version, stamps)
+
+
+class SnapshotManager:
+    """
+    Holds the current snapshot and rebuilds it when the source CSVs change
+    (polled every `interval` seconds, 0 to disable) or reload() is called.
+    One build runs at a time; a failed build keeps the old snapshot.
+    """
+
+    def __init__(self, source_paths, config, interval=0):
+        self.source_paths = source_paths
+        self.config = config
+        self.interval = interval
+        self.current = build_snapshot(source_paths, config)
+        self.reloads = 0
+        self.last_error = None
+        self.last_duration = None
+        # Source stamps of the last failed build: the watcher waits for the
+        # files to change again rather than retrying the same broken CSV
+        self._failed_stamps = None
+        self._build_lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+
+    def changed(self):
+        return source_stamps(self.source_paths) != self.current.stamps
+
+    def reload(self, force=False):
+        """Rebuild now (if the sources changed, or always with force); True if swapped"""
+        with self._build_lock:
+            if not force and not self.changed():
+                return False
+            start = time.perf_counter()
+            stamps = source_stamps(self.source_paths)
+            try:
+                snapshot = build_snapshot(self.source_paths, self.config)
+            except Exception as e:
+                self._failed_stamps = stamps
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"❌ Catalog reload failed: {self.last_error}")
+                return False
+            self.last_duration = time.perf_counter() - start
+            self.last_error = None
+            self._failed_stamps = None
+            self.reloads += 1
+            # Requests that already read self.current keep the old snapshot
+            self.current = snapshot
+            print(f"✅ Catalog reloaded ({len(snapshot.catalog)} titles, version {snapshot.version}) "
+                  f"in {self.last_duration:.1f}s")
+            return True
+
+    def reload_async(self, force=False):
+        """Start a background rebuild; False if one is already running"""
+        if self.building:
+            return False
+        self._thread = threading.Thread(target=self.reload, args=(force,), name='catalog-reload', daemon=True)
+        self._thread.start()
+        return True
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start_watching(self):
+        """Poll the source files in a daemon thread (no-op when interval is 0)"""
+        if self.interval <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name='catalog-watcher', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        previous = self.current.stamps
+        while True:
+            time.sleep(self.interval)
+            stamps = source_stamps(self.source_paths)
+            # Wait until a file has stopped changing for a whole interval, so a
+            # CSV that is still being written is not loaded half-way through
+            if stamps != self.current.stamps and stamps == previous and stamps != self._failed_stamps:
+                self.reload()
+            previous = stamps
+
+    def status(self):
+        snapshot = self.current
+        return {
+            'version': snapshot.version,
+            'titles': len(snapshot.catalog),
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(snapshot.loaded_at)),
+            'building': self.building,
+            'reloads': self.reloads,
+            'last_duration_s': round(self.last_duration, 3) if self.last_duration is not None else None,
+            'last_error': self.last_error,
+            'watch_interval_s': self.interval
+        }
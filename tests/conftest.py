@@ -0,0 +1,42 @@
+"""
+Shared fixtures. The environment is set before any test module imports
+config, so the app never reaches OMDb or writes into the repo's caches.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmp = tempfile.mkdtemp(prefix='movie-tests-')
+os.environ.update({
+    'OMDB_BASE_URL': 'http://127.0.0.1:9/',  # nothing listens there
+    'OMDB_CACHE_PATH': os.path.join(_tmp, 'omdb_cache.sqlite3'),
+    'OMDB_WARM_TITLES': '0',
+    'MODEL_CACHE_DIR': os.path.join(_tmp, 'model_cache'),
+    'COMPILED_DIR': os.path.join(_tmp, 'compiled'),
+    'RELOAD_INTERVAL': '0'
+})
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """The Flask app loaded on the bundled datasets"""
+    # Dataset paths in config are relative to the repo (reloads read them too)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    import app
+    yield app
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def client(app_module):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = 'tester'
+    return client
@@ -0,0 +1,35 @@
+"""The /admin endpoints are off without ADMIN_TOKEN and need it when on"""
+
+import pytest
+
+
+@pytest.fixture
+def token(app_module, monkeypatch):
+    monkeypatch.setattr(app_module.config, 'ADMIN_TOKEN', 's3cret')
+    return 's3cret'
+
+
+@pytest.mark.parametrize('method, url', [('POST', '/admin/reload'), ('GET', '/admin/catalog')])
+def test_disabled_without_a_token(client, method, url):
+    # Even from localhost, where a reverse proxy's requests come from
+    response = client.open(url, method=method, environ_base={'REMOTE_ADDR': '127.0.0.1'})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('method, url', [('POST', '/admin/reload'), ('GET', '/admin/catalog')])
+@pytest.mark.parametrize('headers', [{}, {'X-Admin-Token': 'wrong'}, {'X-Admin-Token': 's3crét'}])
+def test_wrong_token_is_forbidden(client, token, method, url, headers):
+    assert client.open(url, method=method, headers=headers).status_code == 403
+
+
+def test_catalog_status_with_the_token(client, app_module, token):
+    response = client.get('/admin/catalog', headers={'X-Admin-Token': token})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == app_module.snapshots.current.version
+
+
+def test_reload_with_the_token(client, app_module, token):
+    response = client.post('/admin/reload', headers={'X-Admin-Token': token})
+    assert response.status_code == 202
+    assert response.get_json()['started']
+    app_module.snapshots._thread.join()
@@ -0,0 +1,67 @@
+"""Input validation of POST /api/recommendations"""
+
+import pytest
+
+
+def post(client, body):
+    return client.post('/api/recommendations', data=body, content_type='application/json')
+
+
+@pytest.mark.parametrize('body', ['["Avatar"]', '"Avatar"', '42', 'null', '[]'])
+def test_non_object_body_is_rejected(client, body):
+    response = post(client, body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+@pytest.mark.parametrize('titles', ['"Avatar"', '[1, 2]', '{"a": 1}', 'null'])
+def test_titles_must_be_a_list_of_strings(client, titles):
+    response = post(client, f'{{"titles": {titles}}}')
+    assert response.status_code == 400
+    assert 'titles' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('limit', ['1e999', '-1e999', '"ten"', '[5]', '{}'])
+def test_bad_limit_is_rejected(client, limit):
+    response = post(client, f'{{"titles": ["Avatar"], "limit": {limit}}}')
+    assert response.status_code == 400
+    assert 'limit' in response.get_json()['error']
+
+
+def test_unknown_scope_is_rejected(client):
+    response = post(client, '{"titles": ["Avatar"], "scope": "Tollywood"}')
+    assert response.status_code == 400
+
+
+def test_too_many_titles(client, app_module):
+    titles = ', '.join('"Avatar"' for _ in range(app_module.config.API_MAX_TITLES + 1))
+    assert post(client, f'{{"titles": [{titles}]}}').status_code == 400
+
+
+def test_malformed_json_is_rejected(client):
+    assert post(client, '{"titles": [').status_code == 400
+
+
+def test_recommendations_per_title(client):
+    response = post(client, '{"titles": ["Avatar", "No Such Title 123"], "limit": 3}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['not_found'] == ['No Such Title 123']
+    [result] = data['results']
+    assert result['title'] == 'Avatar'
+    assert 0 < len(result['recommendations']) <= 3
+    assert all(rec['title'] != 'Avatar' for rec in result['recommendations'])
+
+
+def test_limit_is_clamped(client, app_module):
+    response = post(client, '{"titles": ["Avatar"], "limit": 100000}')
+    [result] = response.get_json()['results']
+    assert len(result['recommendations']) <= app_module.config.API_MAX_RECOMMENDATIONS
+
+
+def test_seed_set(client):
+    response = post(client, '{"titles": ["Avatar", "Titanic"], "seed": true, "limit": 5}')
+    data = response.get_json()
+    assert data['seeds'] == ['Avatar', 'Titanic']
+    titles = [rec['title'] for rec in data['recommendations']]
+    assert titles and 'Avatar' not in titles and 'Titanic' not in titles
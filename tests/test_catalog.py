@@ -0,0 +1,171 @@
+"""Compiled and compact catalogs round-trip to the catalog built from the CSVs"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import (CATEGORIES, build_catalog, compact_catalog, compile_catalog, load_compact_catalog,
+                     load_compiled_catalog, memory_report, release_dates, to_records)
+from columnar import TextColumn
+
+
+def source_frames():
+    hollywood = pd.DataFrame({
+        'id': [1, 2, 3],
+        'title': ['Amélie', 'Heat ', 'Se7en'],
+        'genre': ['Comedy,Romance', 'Crime, Drama', None],
+        'original_language': ['fr', 'en', 'en'],
+        'overview': ['Une fille à Paris — 🎬', None, 'Two detectives hunt a killer.'],
+        'popularity': [40.5, 25.25, np.nan],
+        'release_date': ['25-04-2001', 'not a date', '22-09-1995'],
+        'vote_average': [7.9, 8.2, 8.3],
+        'vote_count': [10000, 7000, np.nan]
+    })
+    bollywood = pd.DataFrame({
+        'title': ['Lagaan', 'Sholay'],
+        'genre': ['Drama, Sport', 'Action'],
+        'overview': ['Villagers take on the Raj at cricket.', ''],
+        'rating': ['8.1', 'N/A'],
+        'votes': ['16,441', '1,02,000'],
+        'year': ['I 2001', '1975–'],
+        'Duration (in Min)': ['224 min', '204']
+    })
+    webseries = pd.DataFrame({
+        'title': ['Sacred Games'],
+        'genre': ['Crime, Thriller'],
+        'overview': ['A Mumbai cop gets a call from a gangster.'],
+        'rating': [8.7],
+        'votes': [90000],
+        'certificate': ['A']
+    })
+    return hollywood, bollywood, webseries
+
+
+def comparable(frame):
+    """
+    Dates in one resolution (pandas 3 parses to seconds, the compiled store
+    keeps ns), missing text as None (the store does not keep NA vs None) and
+    memory-mapped columns copied into plain arrays
+    """
+    frame = frame.assign(release_date=frame['release_date'].astype('datetime64[ns]'))
+    for name in frame.columns:
+        if frame[name].dtype == object:
+            frame[name] = frame[name].where(frame[name].notna(), None)
+        elif isinstance(frame[name].dtype, np.dtype):
+            frame[name] = np.array(frame[name].to_numpy())
+    return frame
+
+
+@pytest.fixture
+def catalog():
+    return build_catalog(*source_frames())
+
+
+@pytest.fixture
+def source_paths(tmp_path):
+    paths = []
+    for name, frame in zip(['dataset.csv', 'bollywood.csv', 'webseries.csv'], source_frames()):
+        path = str(tmp_path / name)
+        frame.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def test_build_catalog_normalizes_every_source(catalog):
+    assert catalog['category'].tolist() == ['Hollywood'] * 3 + ['Bollywood'] * 2 + ['Web Series']
+    assert catalog['title'].iat[1] == 'Heat'
+    assert catalog['genre'].iat[0] == 'Comedy, Romance'
+    assert catalog['votes'].iat[3] == 16441
+    assert catalog['year'].tolist()[3:5] == [2001, 1975]
+    assert pd.isna(catalog['release_date'].iat[1])
+    assert catalog['overview'].iat[1] == ''
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_compiled_catalog_round_trip(catalog, source_paths, tmp_path, mmap):
+    directory = str(tmp_path / 'compiled')
+    compile_catalog(catalog, directory, source_paths)
+    loaded = load_compiled_catalog(directory, source_paths, mmap=mmap)
+    pd.testing.assert_frame_equal(comparable(loaded), comparable(catalog))
+    assert loaded['category'].cat.categories.tolist() == CATEGORIES
+
+
+def test_compiled_catalog_is_stale_once_a_source_changes(catalog, source_paths, tmp_path):
+    directory = str(tmp_path / 'compiled')
+    compile_catalog(catalog, directory, source_paths)
+    with open(source_paths[2], 'a', encoding='utf-8') as f:
+        f.write('Mirzapur,Crime,Gangs of Purvanchal.,8.4,70000,A\n')
+    assert load_compiled_catalog(directory, source_paths) is None
+
+
+def test_text_column_round_trip(tmp_path):
+    values = ['Amélie — 🎬', '', None, np.nan, 'plain', 'ß' * 1000]
+    column = TextColumn.from_strings(values)
+    expected = ['Amélie — 🎬', '', '', '', 'plain', 'ß' * 1000]
+    assert len(column) == len(values)
+    assert column[0:len(values)] == expected
+    assert column[1:5] == expected[1:5]
+    assert column[::2] == expected[::2]
+    assert [column[i] for i in range(-len(values), 0)] == expected
+
+    column.save(str(tmp_path / 'text'))
+    for mmap in (True, False):
+        loaded = TextColumn.load(str(tmp_path / 'text'), mmap=mmap)
+        assert loaded[0:len(values)] == expected
+        assert loaded.nbytes == column.nbytes
+
+
+def test_empty_text_column_round_trip(tmp_path):
+    column = TextColumn.from_strings(['', None])
+    column.save(str(tmp_path / 'text'))
+    assert TextColumn.load(str(tmp_path / 'text'))[0:2] == ['', '']
+
+
+def test_compact_catalog_keeps_every_value(catalog):
+    compact, overviews = compact_catalog(catalog)
+    assert 'overview' not in compact.columns
+    assert overviews[0:len(catalog)] == catalog['overview'].tolist()
+    assert compact['genre'].dtype == 'category'
+    assert compact['rating'].dtype == np.float32
+    assert compact['year'].dtype == 'Int16'
+
+    pd.testing.assert_series_equal(release_dates(compact['release_date']).astype('datetime64[ns]'),
+                                   catalog['release_date'].astype('datetime64[ns]'))
+    full = to_records(catalog.drop(columns=['overview', 'release_date']))
+    assert to_records(compact.drop(columns=['release_date'])) == full
+
+
+def test_compact_catalog_from_compiled_matches_in_memory(catalog, source_paths, tmp_path):
+    directory = str(tmp_path / 'compiled')
+    compile_catalog(catalog, directory, source_paths)
+    from_disk, mapped = load_compact_catalog(source_paths, directory)
+    in_memory, overviews = compact_catalog(catalog)
+
+    pd.testing.assert_frame_equal(from_disk, in_memory)
+    assert isinstance(mapped.blob, np.memmap)
+    assert mapped[0:len(mapped)] == overviews[0:len(overviews)]
+
+
+def test_compact_catalog_without_compiled_copy(catalog, source_paths, tmp_path):
+    compact, overviews = load_compact_catalog(source_paths, str(tmp_path / 'missing'))
+    assert len(compact) == len(catalog)
+    assert overviews[0] == catalog['overview'].iat[0]
+
+
+def test_memory_report_shrinks(catalog):
+    compact, overviews = compact_catalog(catalog)
+    before, after = memory_report(catalog), memory_report(compact, overviews)
+    assert set(before) == set(after)
+    assert sum(after.values()) < sum(before.values())
+
+
+def test_compiled_catalog_in_an_older_format_is_ignored(catalog, source_paths, tmp_path):
+    directory = str(tmp_path / 'compiled')
+    compile_catalog(catalog, directory, source_paths)
+    manifest_path = tmp_path / 'compiled' / 'manifest.json'
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    del manifest['format']
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+    assert load_compiled_catalog(directory, source_paths) is None
@@ -0,0 +1,126 @@
+"""OMDb client: single-flight coalescing, the token bucket and backoff"""
+
+import threading
+import time
+
+import pytest
+
+from fake_omdb import FakeOMDbServer
+from omdb import MISSING, OMDbCache, OMDbClient, TokenBucket
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OMDbCache(str(tmp_path / 'cache.sqlite3'))
+
+
+def test_bucket_allows_a_burst_then_refuses():
+    bucket = TokenBucket(rate=1, burst=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+
+
+def test_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=20, burst=1)
+    assert bucket.acquire(timeout=0)
+    start = time.monotonic()
+    assert bucket.acquire(timeout=1)
+    assert 0.03 <= time.monotonic() - start < 0.5
+
+
+def test_bucket_reserve_leaves_tokens_for_others():
+    bucket = TokenBucket(rate=0.001, burst=4)
+    # Low priority callers stop while only the reserved two tokens remain
+    assert bucket.acquire(timeout=0, reserve=2)
+    assert bucket.acquire(timeout=0, reserve=2)
+    assert not bucket.acquire(timeout=0, reserve=2)
+    assert bucket.acquire(timeout=0)
+    assert bucket.acquire(timeout=0)
+    assert not bucket.acquire(timeout=0)
+
+
+def test_bucket_pause_holds_everyone_back():
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.pause(0.2)
+    assert not bucket.acquire(timeout=0.05)
+    assert bucket.acquire(timeout=1)
+
+
+def test_zero_rate_means_no_limit():
+    bucket = TokenBucket(rate=0, burst=1)
+    assert all(bucket.acquire(timeout=0, reserve=1) for _ in range(100))
+    bucket.pause(0.1)
+    assert not bucket.acquire(timeout=0.01)
+    assert bucket.acquire(timeout=1)
+
+
+def test_concurrent_lookups_share_one_upstream_request(cache):
+    with FakeOMDbServer(latency=0.3) as server:
+        client = OMDbClient('key', server.url, cache=cache, max_workers=4)
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(client.get_details(
+            'The Matrix' if i % 2 else '  the   MATRIX '))) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert server.requests == 1
+        assert len(results) == 20 and all(result['poster'] for result in results)
+        assert client.stats()['coalesced'] >= 1
+        # Answered from the cache afterwards
+        client.get_details('The Matrix')
+        assert server.requests == 1
+
+
+def test_batch_dedupes_and_fetches_misses_concurrently(cache):
+    with FakeOMDbServer(latency=0.2, titles=['Heat', 'Alien']) as server:
+        client = OMDbClient('key', server.url, cache=cache, max_workers=8)
+        start = time.monotonic()
+        details = client.get_details_batch(['Heat', 'Alien', 'Heat', 'Nope'], deadline=2)
+        assert time.monotonic() - start < 0.6
+        assert server.requests == 3
+        assert details['Heat']['poster'] and details['Alien']['poster']
+        assert details['Nope'] is None
+        # "Not found" is cached too
+        assert client.get_cached('Nope', MISSING) is None
+
+
+def test_batch_marks_late_titles_missing(cache):
+    with FakeOMDbServer(latency=0.5) as server:
+        client = OMDbClient('key', server.url, cache=cache)
+        details = client.get_details_batch(['Heat'], deadline=0.05, missing=MISSING)
+        assert details['Heat'] is MISSING
+        assert client.stats()['deadline_exceeded'] == 1
+
+
+def test_limiter_caps_the_request_rate(cache):
+    with FakeOMDbServer() as server:
+        client = OMDbClient('key', server.url, cache=cache, max_workers=8,
+                            limiter=TokenBucket(rate=20, burst=2))
+        start = time.monotonic()
+        client.get_details_batch([f"Title {i}" for i in range(12)], deadline=5)
+        # 2 from the burst, the other 10 at 20 per second
+        assert time.monotonic() - start >= 0.45
+        assert server.requests == 12
+
+
+def test_rate_limited_lookups_fail_fast_and_are_not_cached(cache):
+    with FakeOMDbServer() as server:
+        bucket = TokenBucket(rate=0.001, burst=1)
+        client = OMDbClient('key', server.url, cache=cache, limiter=bucket, queue_timeout=0.05)
+        assert client.get_details('Heat') is not None
+        assert client.get_details('Alien') is None
+        assert client.stats()['rate_limited'] == 1
+        assert client.get_cached('Alien', MISSING) is MISSING
+
+
+def test_errors_back_off(cache):
+    with FakeOMDbServer(error_rate=1.0) as server:
+        bucket = TokenBucket(rate=100, burst=10)
+        client = OMDbClient('key', server.url, cache=cache, limiter=bucket, queue_timeout=0.05, backoff=0.5)
+        assert client.get_details('Heat') is None
+        # The failure paused the limiter, so the next lookup gives up instead of hitting OMDb
+        assert client.get_details('Alien') is None
+        assert server.requests == 1
+        assert client.stats()['errors'] == 1 and client.stats()['rate_limited'] == 1
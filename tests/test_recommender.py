@@ -0,0 +1,102 @@
+"""TF-IDF fitted directly and from merged per-dataset counts, and the precomputed neighbor table"""
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from recommender import HybridRanker, NeighborTable, RecommendationModel, TermCounts
+
+HOLLYWOOD = [
+    'A banker is framed for murder and sent to prison.',
+    'A mafia family patriarch hands the empire to his reluctant son.',
+    'Toys come to life when their owner leaves the room.',
+    '',
+    'The son of a crime family returns home to take over the business.',
+]
+BOLLYWOOD = [
+    'Two lovers meet on a train across Europe and fall in love.',
+    'A cricket team of villagers challenges the British rulers.',
+    'The the the and of',  # nothing but stop words
+]
+WEBSERIES = [
+    'A chemistry teacher turns to crime after a cancer diagnosis.',
+    'Detectives hunt a serial killer across two decades.',
+]
+
+
+def direct_fit(texts):
+    vectorizer = TfidfVectorizer(stop_words='english', dtype=np.float32)
+    return vectorizer.fit_transform(texts), vectorizer.get_feature_names_out().tolist()
+
+
+def test_merged_counts_equal_a_direct_fit():
+    parts = [TermCounts.count(texts) for texts in (HOLLYWOOD, BOLLYWOOD, WEBSERIES)]
+    model = RecommendationModel.from_counts(parts)
+    expected, vocabulary = direct_fit(HOLLYWOOD + BOLLYWOOD + WEBSERIES)
+
+    assert model.vocabulary == vocabulary
+    assert model.matrix.shape == expected.shape
+    np.testing.assert_allclose(model.matrix.toarray(), expected.toarray(), rtol=1e-5, atol=1e-6)
+
+
+def test_fit_equals_a_direct_fit():
+    model = RecommendationModel.fit(HOLLYWOOD)
+    expected, vocabulary = direct_fit(HOLLYWOOD)
+    assert model.vocabulary == vocabulary
+    np.testing.assert_allclose(model.matrix.toarray(), expected.toarray(), rtol=1e-5, atol=1e-6)
+
+
+def test_part_without_vocabulary_keeps_its_rows():
+    parts = [TermCounts.count(HOLLYWOOD), TermCounts.count(['the of and', ''])]
+    model = RecommendationModel.from_counts(parts)
+    assert model.matrix.shape[0] == len(HOLLYWOOD) + 2
+    assert model.matrix[len(HOLLYWOOD):].nnz == 0
+
+
+def test_saved_counts_round_trip(tmp_path):
+    counts = TermCounts.count(BOLLYWOOD)
+    counts.save(str(tmp_path / 'counts'))
+    loaded = TermCounts.load(str(tmp_path / 'counts'))
+    assert loaded.vocabulary == counts.vocabulary
+    assert (loaded.counts != counts.counts).nnz == 0
+
+
+def brute_force_neighbors(matrix, k):
+    sims = (matrix @ matrix.T).toarray()
+    np.fill_diagonal(sims, -np.inf)
+    return np.sort(sims, axis=1)[:, ::-1][:, :k]
+
+
+@pytest.mark.parametrize('block_size', [None, 1, 3])
+def test_neighbor_table_matches_brute_force(block_size):
+    model = RecommendationModel.fit(HOLLYWOOD + BOLLYWOOD + WEBSERIES)
+    table = NeighborTable.build(model.matrix, k=4, block_size=block_size)
+
+    assert table.indices.shape == (model.matrix.shape[0], 4)
+    assert not (table.indices == np.arange(model.matrix.shape[0])[:, np.newaxis]).any()
+    np.testing.assert_allclose(table.scores, brute_force_neighbors(model.matrix, 4), atol=1e-6)
+
+
+def test_neighbor_table_round_trip(tmp_path):
+    model = RecommendationModel.fit(HOLLYWOOD + WEBSERIES)
+    table = NeighborTable.build(model.matrix, k=3)
+    table.save(str(tmp_path))
+    loaded = NeighborTable.load(str(tmp_path))
+    assert (loaded.indices == table.indices).all()
+    assert (loaded.scores == table.scores).all()
+
+
+@pytest.mark.parametrize('with_table', [False, True])
+def test_hybrid_ranking_blends_pool_similarity_with_quality(with_table):
+    model = RecommendationModel.fit(HOLLYWOOD + BOLLYWOOD + WEBSERIES)
+    n = model.matrix.shape[0]
+    if with_table:
+        model.neighbors = NeighborTable.build(model.matrix, k=n - 1)
+    rating = np.linspace(0, 1, n, dtype=np.float32)
+    ranker = HybridRanker(rating, np.zeros(n, dtype=np.float32), {'rating': 0.5}, pool_factor=2)
+    sims = (model.matrix @ model.matrix.T).toarray()
+
+    for row in range(n):
+        pool = model.similar(row, 6)
+        expected = pool[np.argsort(-(sims[row, pool] + 0.5 * rating[pool]), kind='stable')][:3]
+        assert model.similar(row, 3, ranker=ranker).tolist() == expected.tolist()
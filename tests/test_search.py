@@ -0,0 +1,31 @@
+"""Title search through the n-gram index and /api/suggest"""
+
+import pytest
+
+from indexes import SearchIndex
+
+TITLES = ['The Matrix', 'Matrix Reloaded', 'Heat', 'The Dark Knight', 'Animatrix']
+
+
+@pytest.fixture
+def index():
+    return SearchIndex(TITLES, scores=[5, 4, 3, 2, 1])
+
+
+def test_search_finds_substrings_best_first(index):
+    assert index.search('matrix') == [0, 1, 4]
+    assert index.search('matrix', prefix=True) == [1]
+    assert index.search('matrix', limit=2) == [0, 1]
+
+
+@pytest.mark.parametrize('limit', [0, -5])
+def test_non_positive_limit_finds_nothing(index, limit):
+    assert index.search('matrix', limit=limit) == []
+    assert index.suggest('matrix', limit=limit) == []
+
+
+@pytest.mark.parametrize('limit, expected', [('0', 1), ('-5', 1), ('3', 3), ('1000', 50)])
+def test_suggest_limit_is_clamped(client, limit, expected):
+    response = client.get(f'/api/suggest?q=a&limit={limit}')
+    assert response.status_code == 200
+    assert len(response.get_json()['suggestions']) == expected
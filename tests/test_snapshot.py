@@ -0,0 +1,56 @@
+"""Catalog snapshots: a broken source CSV fails the reload and keeps the old snapshot"""
+
+import pytest
+
+from config import config
+from snapshot import SnapshotManager
+
+HOLLYWOOD = 'title,overview,vote_average,vote_count\nHeat,A thief and a detective,8.3,7000\nAlien,A crew meets a creature,8.5,9000\n'
+BOLLYWOOD = 'title,overview,rating,votes\nLagaan,Villagers play cricket against the Raj,8.1,16441\n'
+WEBSERIES = 'title,overview,rating,votes\nSacred Games,A cop gets a call from a gangster,8.7,90000\n'
+
+
+@pytest.fixture
+def source_paths(tmp_path):
+    paths = []
+    for name, text in [('dataset.csv', HOLLYWOOD), ('bollywood.csv', BOLLYWOOD), ('webseries.csv', WEBSERIES)]:
+        (tmp_path / name).write_text(text, encoding='utf-8')
+        paths.append(str(tmp_path / name))
+    return paths
+
+
+def test_missing_optional_source_is_allowed(source_paths, tmp_path):
+    (tmp_path / 'webseries.csv').unlink()
+    snapshots = SnapshotManager(source_paths, config)
+    assert snapshots.current.catalog['category'].value_counts()['Web Series'] == 0
+
+
+@pytest.mark.parametrize('text, error', [
+    ('title,overview\n', 'no rows'),
+    ('garbage\n', 'missing column(s) title, overview'),
+    ('name,overview\nX,Y\n', 'missing column(s) title'),
+    ('', 'not a readable CSV')
+])
+def test_broken_source_keeps_the_old_snapshot(source_paths, text, error):
+    snapshots = SnapshotManager(source_paths, config)
+    before = snapshots.current
+
+    with open(source_paths[2], 'w', encoding='utf-8') as f:
+        f.write(text)
+    assert not snapshots.reload()
+    assert snapshots.current is before
+    assert source_paths[2] in snapshots.last_error and error in snapshots.last_error
+
+    # Fixed files reload again
+    with open(source_paths[2], 'w', encoding='utf-8') as f:
+        f.write(WEBSERIES + 'Mirzapur,Gangs of Purvanchal,8.4,70000\n')
+    assert snapshots.reload()
+    assert snapshots.last_error is None
+    assert (snapshots.current.catalog['category'] == 'Web Series').sum() == 2
+
+
+def test_broken_source_fails_the_first_build(source_paths):
+    with open(source_paths[1], 'w', encoding='utf-8') as f:
+        f.write('title,overview\n')
+    with pytest.raises(ValueError, match='no rows'):
+        SnapshotManager(source_paths, config)